@@ -35,6 +35,12 @@ class Settings(BaseSettings):
     CACHE_ENABLED: bool = True
     CACHE_DIR: str = "./data/cache"
 
+    # Trace watersheds on a CUDA device (requires the optional cupy package)
+    USE_GPU: bool = False
+
+    # GDAL block cache size (MB) shared by the cached raster handles
+    GDAL_CACHEMAX: int = 512
+
     # PMTiles URLs
     PUBLIC_HILLSHADE_URL: str = "/tiles/hillshade.pmtiles"
     PUBLIC_SLOPE_URL: str = "/tiles/slope.pmtiles"
@@ -6,6 +6,7 @@ from pathlib import Path
 
 from app.routes import delineate, cross_section, features, tiles
 from app.config import settings
+from app.services.watershed import close_datasets
 
 
 @asynccontextmanager
@@ -16,6 +17,10 @@ async def lifespan(app: FastAPI):
     print(f"DEM path: {settings.DEM_PATH}")
     print(f"Cache enabled: {settings.CACHE_ENABLED}")
 
+    # Size GDAL's block cache before the first raster is opened so repeated
+    # reads through the cached dataset handles are served from memory
+    os.environ.setdefault("GDAL_CACHEMAX", str(settings.GDAL_CACHEMAX))
+
     # Ensure cache directory exists
     if settings.CACHE_ENABLED:
         Path(settings.CACHE_DIR).mkdir(parents=True, exist_ok=True)
@@ -24,6 +29,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("Shutting down Hydro-Map API server...")
+    close_datasets()
 
 
 app = FastAPI(
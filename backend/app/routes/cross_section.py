@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Tuple, Optional
 import rasterio
-from rasterio.transform import rowcol
+import shapely
 from shapely.geometry import LineString, Point
 import geopandas as gpd
 import numpy as np
@@ -131,7 +131,7 @@ async def sample_elevation_profile(
             x, y = transform_coordinates_to_raster_crs(lon, lat, dem_src.crs)
 
             # Get elevation value
-            row, col = rowcol(dem_src.transform, x, y)
+            row, col = dem_src.index(x, y)
 
             if 0 <= row < dem_src.height and 0 <= col < dem_src.width:
                 elevation = float(dem_src.read(1, window=((row, row+1), (col, col+1)))[0, 0])
@@ -176,8 +176,10 @@ async def get_geology_contacts(line: LineString) -> List[dict]:
         if geology_gdf.crs != line_gdf.crs:
             geology_gdf = geology_gdf.to_crs(line_gdf.crs)
 
-        # Find intersecting geology polygons
-        intersecting = geology_gdf[geology_gdf.intersects(line)]
+        # Find intersecting geology polygons, testing them against the
+        # prepared line so GEOS indexes its segments once
+        shapely.prepare(line)
+        intersecting = geology_gdf[shapely.intersects(line, geology_gdf.geometry.values)]
 
         if len(intersecting) == 0:
             return []
@@ -187,10 +189,11 @@ async def get_geology_contacts(line: LineString) -> List[dict]:
         line_proj = line_gdf_proj.geometry.values[0]
         intersecting_proj = intersecting.to_crs("EPSG:6933")
 
-        # Find contact points
+        # Find contact points, clipping the line against every formation in
+        # one GEOS call rather than once per row
+        intersections = shapely.intersection(line_proj, intersecting_proj.geometry.values)
         contacts = []
-        for idx, row in intersecting_proj.iterrows():
-            intersection = line_proj.intersection(row.geometry)
+        for (idx, row), intersection in zip(intersecting_proj.iterrows(), intersections):
 
             if intersection.is_empty:
                 continue
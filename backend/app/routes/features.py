@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 import geopandas as gpd
+import numpy as np
+import shapely
 from shapely.geometry import Point
 from shapely.ops import nearest_points
 from pathlib import Path
@@ -23,13 +25,21 @@ _dataset_cache: Dict[str, Dict] = {}
 _cache_lock = Lock()
 
 
-def _load_dataset_cached(file_path: str, layer: Optional[str] = None) -> Optional[gpd.GeoDataFrame]:
+def _load_dataset_cached(
+    file_path: str,
+    layer: Optional[str] = None,
+    crs: Optional[str] = None
+) -> Optional[gpd.GeoDataFrame]:
     """
     Load a GeoDataFrame with caching and mtime-based invalidation.
 
+    Reprojected copies are cached alongside the source dataset, so each
+    dataset is transformed to a given CRS once rather than on every request.
+
     Args:
         file_path: Path to GeoPackage file
         layer: Optional layer name for GeoPackage
+        crs: Optional CRS to return the dataset in
 
     Returns:
         GeoDataFrame or None if file doesn't exist
@@ -41,6 +51,24 @@ def _load_dataset_cached(file_path: str, layer: Optional[str] = None) -> Optiona
     cache_key = f"{file_path}:{layer}" if layer else file_path
     current_mtime = os.path.getmtime(path)
 
+    if crs is not None:
+        gdf = _load_dataset_cached(file_path, layer)
+        if gdf is None or gdf.crs == crs:
+            return gdf
+
+        cache_key = f"{cache_key}@{crs}"
+        with _cache_lock:
+            cached = _dataset_cache.get(cache_key)
+            if cached is not None and cached['mtime'] == current_mtime:
+                return cached['gdf']
+
+            gdf = gdf.to_crs(crs)
+            _dataset_cache[cache_key] = {
+                'gdf': gdf,
+                'mtime': current_mtime
+            }
+            return gdf
+
     with _cache_lock:
         if cache_key in _dataset_cache:
             cached_mtime = _dataset_cache[cache_key]['mtime']
@@ -95,7 +123,8 @@ def query_features_with_fallback(
     point: Point,
     buffer_m: float,
     max_distance_m: float = 250,
-    crs_proj: str = "EPSG:6933"
+    crs_proj: str = "EPSG:6933",
+    source: Optional[tuple[str, Optional[str]]] = None
 ) -> tuple[gpd.GeoDataFrame, bool]:
     """
     Query features using spatial index with nearest-feature fallback.
@@ -110,6 +139,8 @@ def query_features_with_fallback(
         buffer_m: Buffer distance in meters
         max_distance_m: Maximum distance for nearest-feature fallback
         crs_proj: Projected CRS for accurate distance calculations
+        source: Optional (file_path, layer) gdf was loaded from; its projected
+            copy is then cached instead of reprojecting gdf on every fallback
 
     Returns:
         Tuple of (GeoDataFrame with matching features, is_nearest flag)
@@ -132,31 +163,33 @@ def query_features_with_fallback(
         # Fall back to full dataset if no spatial index
         possible_matches = gdf
 
-    # Filter by actual intersection
-    intersecting = possible_matches[possible_matches.intersects(buffer_wgs84)]
+    # Filter by actual intersection, testing every candidate against the
+    # prepared buffer so GEOS indexes its edges once
+    shapely.prepare(buffer_wgs84)
+    intersecting = possible_matches[shapely.intersects(buffer_wgs84, possible_matches.geometry.values)]
 
     if len(intersecting) > 0:
         return intersecting, False
 
     # Fallback: Find nearest feature within max_distance
     # Project to accurate CRS for distance calculation
-    gdf_proj = gdf.to_crs(crs_proj)
+    gdf_proj = _load_dataset_cached(*source, crs=crs_proj) if source else None
+    if gdf_proj is None:
+        gdf_proj = gdf.to_crs(crs_proj)
     point_proj = point_gdf_proj.geometry.values[0]
 
-    # Calculate distances to all features
-    distances = gdf_proj.geometry.apply(lambda geom: geom.distance(point_proj))
-
-    # Filter by max distance
-    within_max = distances <= max_distance_m
+    # Single spatial-index nearest query bounded by max_distance; return_all
+    # keeps every feature tied at the minimum distance
+    _, nearest_idx = gdf_proj.sindex.nearest(
+        point_proj, max_distance=max_distance_m, return_all=True
+    )
 
-    if not within_max.any():
+    if len(nearest_idx) == 0:
         # No features within max distance
         return gpd.GeoDataFrame(), False
 
     # Get the nearest feature(s)
-    min_distance = distances[within_max].min()
-    nearest_mask = (distances == min_distance) & within_max
-    nearest_features = gdf[nearest_mask]
+    nearest_features = gdf.iloc[np.sort(nearest_idx)]
 
     return nearest_features, True
 
@@ -284,7 +317,8 @@ async def query_streams(
 
         # Use spatial index query with nearest-feature fallback
         matching_gdf, is_nearest = query_features_with_fallback(
-            streams_gdf, point, buffer_m, max_distance_m=250
+            streams_gdf, point, buffer_m, max_distance_m=250,
+            source=(str(streams_path), layer_name)
         )
 
         if len(matching_gdf) == 0:
@@ -370,15 +404,11 @@ async def query_fairfax_watersheds(point: Point) -> tuple[Optional[Dict], List[D
 
     try:
         # Read Fairfax watersheds (with caching)
-        watersheds_gdf = _load_dataset_cached(str(watersheds_path))
+        watersheds_gdf = _load_dataset_cached(str(watersheds_path), crs="EPSG:4326")
         if watersheds_gdf is None:
             warnings.append({"level": "error", "message": "Failed to load Fairfax watersheds dataset", "source": "query_fairfax_watersheds"})
             return None, warnings
 
-        # Ensure same CRS
-        if watersheds_gdf.crs != "EPSG:4326":
-            watersheds_gdf = watersheds_gdf.to_crs("EPSG:4326")
-
         # Use spatial index to prefilter candidates
         if hasattr(watersheds_gdf, 'sindex') and watersheds_gdf.sindex is not None:
             possible_matches_idx = list(watersheds_gdf.sindex.intersection(point.bounds))
@@ -435,15 +465,11 @@ async def query_geology(point: Point, buffer_m: float) -> tuple[Optional[List[Di
 
     try:
         # Read geology (with caching)
-        geology_gdf = _load_dataset_cached(str(geology_path))
+        geology_gdf = _load_dataset_cached(str(geology_path), crs="EPSG:4326")
         if geology_gdf is None:
             warnings.append({"level": "error", "message": "Failed to load geology dataset", "source": "query_geology"})
             return None, warnings
 
-        # Ensure same CRS
-        if geology_gdf.crs != "EPSG:4326":
-            geology_gdf = geology_gdf.to_crs("EPSG:4326")
-
         features = []
 
         # FIRST: Find all polygons that CONTAIN the click point (with spatial index)
@@ -504,7 +530,8 @@ async def query_geology(point: Point, buffer_m: float) -> tuple[Optional[List[Di
         else:
             # SECOND: If no polygon contains the point, use spatial query with fallback
             matching_gdf, is_nearest = query_features_with_fallback(
-                geology_gdf, point, buffer_m, max_distance_m=250
+                geology_gdf, point, buffer_m, max_distance_m=250,
+                source=(str(geology_path), None)
             )
 
             if len(matching_gdf) == 0:
@@ -618,15 +645,11 @@ async def query_inadequate_outfalls(point: Point, buffer_m: float) -> tuple[Opti
 
     try:
         # Read inadequate outfalls (with caching)
-        outfalls_gdf = _load_dataset_cached(str(outfalls_path), layer_name)
+        outfalls_gdf = _load_dataset_cached(str(outfalls_path), layer_name, crs="EPSG:4326")
         if outfalls_gdf is None:
             warnings.append({"level": "error", "message": "Failed to load inadequate outfalls dataset", "source": "query_inadequate_outfalls"})
             return None, warnings
 
-        # Ensure same CRS
-        if outfalls_gdf.crs != "EPSG:4326":
-            outfalls_gdf = outfalls_gdf.to_crs("EPSG:4326")
-
         features = []
 
         # FIRST: Find all polygons that CONTAIN the click point (with spatial index)
@@ -679,7 +702,8 @@ async def query_inadequate_outfalls(point: Point, buffer_m: float) -> tuple[Opti
         else:
             # SECOND: If no polygon contains the point, use spatial query with fallback
             matching_gdf, is_nearest = query_features_with_fallback(
-                outfalls_gdf, point, buffer_m, max_distance_m=250
+                outfalls_gdf, point, buffer_m, max_distance_m=250,
+                source=(str(outfalls_path), layer_name)
             )
 
             if len(matching_gdf) == 0:
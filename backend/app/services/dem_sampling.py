@@ -8,7 +8,6 @@ at point locations for feature information queries.
 from typing import Optional, Dict
 from pathlib import Path
 import rasterio
-from rasterio.transform import rowcol
 from pyproj import CRS, Transformer
 
 from app.config import settings
@@ -65,7 +64,7 @@ def sample_raster_at_point(
             x, y = transform_coordinates_to_raster_crs(lon, lat, src.crs)
 
             # Get pixel row/col
-            row, col = rowcol(src.transform, x, y)
+            row, col = src.index(x, y)
 
             # Check bounds
             if 0 <= row < src.height and 0 <= col < src.width:
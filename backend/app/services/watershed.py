@@ -8,22 +8,170 @@ This module provides functions for:
 """
 
 from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from threading import Lock, get_ident
+from typing import Dict, List, Optional, Tuple
 import asyncio
+import atexit
+import math
+import os
 import numpy as np
 import rasterio
-from rasterio.transform import rowcol
+import shapely
+from rasterio.transform import Affine
 from rasterio.features import shapes
 from rasterio.crs import CRS
-from shapely.geometry import shape, Point, mapping
+from shapely.geometry import shape, mapping
 from shapely.ops import unary_union
-import geopandas as gpd
-from pyproj import Transformer
+from pyproj import Geod, Transformer
 import json
 
 from app.config import settings
 
+try:
+    import cupy  # type: ignore
+except ImportError:  # pragma: no cover - CUDA optional dependency
+    cupy = None
+
+try:
+    import numba  # type: ignore
+except ImportError:  # pragma: no cover - numba optional dependency
+    numba = None
+
+
+# Process-wide cache of open read-only raster handles. GDAL dataset handles are
+# not safe to share across threads, so entries are keyed per worker thread;
+# asyncio.to_thread reuses a bounded pool, which keeps the handle count small.
+_DATASETS: Dict[Tuple[str, int], Dict] = {}
+_datasets_lock = Lock()
+
+_WGS84 = CRS.from_epsg(4326)
+
+
+@dataclass(frozen=True)
+class _RasterMeta:
+    """Per-raster values derived once at open time for the request hot path."""
+
+    crs: CRS
+    crs_wkt: str
+    transform: Affine
+    inv_transform: Affine
+    res: Tuple[float, float]
+    pixel_size_min: float
+    is_wgs84: bool
+
+
+def _build_raster_meta(ds: rasterio.io.DatasetReader) -> _RasterMeta:
+    return _RasterMeta(
+        crs=ds.crs,
+        crs_wkt=ds.crs.to_wkt() if ds.crs is not None else "",
+        transform=ds.transform,
+        inv_transform=~ds.transform,
+        res=ds.res,
+        pixel_size_min=min(abs(ds.res[0]), abs(ds.res[1])),
+        is_wgs84=ds.crs is not None and ds.crs.to_epsg() == 4326,
+    )
+
+
+def _get_cached_entry(path: Path) -> Dict:
+    cache_key = (str(path), get_ident())
+    current_mtime = os.path.getmtime(path)
+
+    with _datasets_lock:
+        entry = _DATASETS.get(cache_key)
+        if entry is not None:
+            if not entry['ds'].closed and entry['mtime'] == current_mtime:
+                return entry
+            entry['ds'].close()
+
+        ds = rasterio.open(path)
+        entry = {
+            'ds': ds,
+            'meta': _build_raster_meta(ds),
+            'mtime': current_mtime
+        }
+        _DATASETS[cache_key] = entry
+        return entry
+
+
+def _get_dataset(path: Path) -> rasterio.io.DatasetReader:
+    """
+    Return a cached read-only rasterio handle for ``path``.
+
+    Handles are reopened when closed or when the file's mtime changes, so
+    regenerated rasters are picked up without restarting the server.
+
+    Args:
+        path: Path to raster file
+
+    Returns:
+        Open rasterio dataset
+    """
+    return _get_cached_entry(path)['ds']
+
+
+def _get_raster(path: Path) -> Tuple[rasterio.io.DatasetReader, _RasterMeta]:
+    """
+    Return a cached rasterio handle together with its precomputed metadata.
+
+    Args:
+        path: Path to raster file
+
+    Returns:
+        Tuple of (open rasterio dataset, raster metadata)
+    """
+    entry = _get_cached_entry(path)
+    return entry['ds'], entry['meta']
+
+
+def close_datasets() -> None:
+    """Close all cached raster handles."""
+    with _datasets_lock:
+        for entry in _DATASETS.values():
+            entry['ds'].close()
+        _DATASETS.clear()
+
+
+atexit.register(close_datasets)
+
+
+# WKT and WGS84 flag of recently seen CRS objects, keyed by identity: hashing
+# or comparing a rasterio CRS serializes it to WKT, which is the cost the
+# transformer cache is meant to avoid. Each CRS is held so its id is not reused.
+_CRS_INFO_CACHE_SIZE = 16
+_crs_info_by_id: Dict[int, Tuple[CRS, str, bool]] = {}
+
+
+def _crs_info(crs: CRS) -> Tuple[str, bool]:
+    """Return (WKT, is WGS84) for a CRS, serializing each CRS object once."""
+    entry = _crs_info_by_id.get(id(crs))
+    if entry is None or entry[0] is not crs:
+        if len(_crs_info_by_id) >= _CRS_INFO_CACHE_SIZE:
+            _crs_info_by_id.clear()
+        entry = (crs, crs.to_wkt(), crs == _WGS84)
+        _crs_info_by_id[id(crs)] = entry
+    return entry[1], entry[2]
+
+
+@lru_cache(maxsize=16)
+def _get_transformer(src_crs: str, dst_crs: str) -> Transformer:
+    """Build (once) and return an always_xy Transformer between two CRS strings."""
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+def _to_raster_crs(lon: float, lat: float, meta: _RasterMeta) -> Tuple[float, float]:
+    if meta.is_wgs84:
+        return lon, lat
+    return _get_transformer("EPSG:4326", meta.crs_wkt).transform(lon, lat)
+
+
+def _to_wgs84(x: float, y: float, meta: _RasterMeta) -> Tuple[float, float]:
+    if meta.is_wgs84:
+        return x, y
+    return _get_transformer(meta.crs_wkt, "EPSG:4326").transform(x, y)
+
 
 def transform_coordinates_to_raster_crs(
     lon: float, lat: float, raster_crs: CRS
@@ -39,16 +187,43 @@ def transform_coordinates_to_raster_crs(
     Returns:
         Tuple of (x, y) in raster CRS
     """
+    crs_wkt, is_wgs84 = _crs_info(raster_crs)
+
     # If already in WGS84, return as-is
-    if raster_crs == CRS.from_epsg(4326):
+    if is_wgs84:
         return lon, lat
 
-    # Create transformer from WGS84 to raster CRS
-    transformer = Transformer.from_crs("EPSG:4326", raster_crs, always_xy=True)
+    # Reuse a cached transformer from WGS84 to raster CRS
+    transformer = _get_transformer("EPSG:4326", crs_wkt)
     x, y = transformer.transform(lon, lat)
     return x, y
 
 
+def _rowcol_batch(
+    transform: Affine, xs: np.ndarray, ys: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert arrays of raster-CRS coordinates to row/col indices.
+
+    Inverts the affine once and applies it to all points with NumPy, instead
+    of calling ``rowcol`` per point.
+
+    Args:
+        transform: Raster affine transform
+        xs: X coordinates in raster CRS
+        ys: Y coordinates in raster CRS
+
+    Returns:
+        Tuple of (rows, cols) as int64 arrays
+    """
+    inv = ~transform
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    cols = np.floor(inv.a * xs + inv.b * ys + inv.c).astype(np.int64)
+    rows = np.floor(inv.d * xs + inv.e * ys + inv.f).astype(np.int64)
+    return rows, cols
+
+
 def calculate_snap_radius_pixels(
     radius_meters: int, raster_crs: CRS, center_lon: float, center_lat: float, pixel_size: Tuple[float, float]
 ) -> int:
@@ -65,42 +240,77 @@ def calculate_snap_radius_pixels(
     Returns:
         Radius in pixels
     """
-    # For WGS84, use approximate conversion (meters per degree at latitude)
-    if raster_crs == CRS.from_epsg(4326):
-        meters_per_degree = 111320 * np.cos(np.radians(center_lat))
-        radius_degrees = radius_meters / meters_per_degree
-        pixel_radius = int(radius_degrees / min(pixel_size[0], abs(pixel_size[1])))
+    pixel_size_min = min(abs(pixel_size[0]), abs(pixel_size[1]))
+    return _snap_radius_pixels(radius_meters, raster_crs == _WGS84, center_lat, pixel_size_min)
+
+
+def _snap_radius_pixels(
+    radius_meters: int, is_wgs84: bool, center_lat: float, pixel_size_min: float
+) -> int:
+    if is_wgs84:
+        # For WGS84, use approximate conversion (meters per degree at latitude)
+        meters_per_degree = 111320 * math.cos(math.radians(center_lat))
+        pixel_radius = int(radius_meters / (meters_per_degree * pixel_size_min))
     else:
         # For projected CRS, pixel size is already in meters (or similar units)
-        pixel_radius = int(radius_meters / min(abs(pixel_size[0]), abs(pixel_size[1])))
+        pixel_radius = int(radius_meters / pixel_size_min)
 
     return max(1, pixel_radius)
 
 
+def _snap_radius_pixels_batch(
+    radius_meters: int, is_wgs84: bool, center_lats: np.ndarray, pixel_size_min: float
+) -> np.ndarray:
+    """
+    Vectorized ``_snap_radius_pixels`` for many points on the same raster.
+
+    Projected rasters get one radius for every point; geographic rasters
+    evaluate cos(lat) once per point in a single NumPy pass.
+    """
+    center_lats = np.asarray(center_lats, dtype=np.float64)
+    if is_wgs84:
+        meters_per_degree = 111320 * np.cos(np.radians(center_lats))
+        pixel_radius = (radius_meters / (meters_per_degree * pixel_size_min)).astype(np.int64)
+    else:
+        pixel_radius = np.full(center_lats.shape, int(radius_meters / pixel_size_min), dtype=np.int64)
+
+    return np.maximum(pixel_radius, 1)
+
+
+_GEOD = Geod(ellps="WGS84")
+
+# WGS84 constants for the cheap-ruler approximation
+_RULER_M_PER_RAD = 6378137.0
+_RULER_E2 = (1 / 298.257223563) * (2 - 1 / 298.257223563)
+
+
 def calculate_distance_meters(
-    lon1: float, lat1: float, lon2: float, lat2: float
+    lon1: float, lat1: float, lon2: float, lat2: float, approx: bool = False
 ) -> float:
     """
-    Calculate distance between two WGS84 points using Haversine formula.
+    Calculate the geodesic distance between two WGS84 points.
 
     Args:
         lon1, lat1: First point
         lon2, lat2: Second point
+        approx: Use the cheap-ruler local approximation (accurate to well
+            under 0.1% over the few-km distances used for snapping)
 
     Returns:
         Distance in meters
     """
-    # Use GeoDataFrame for accurate distance calculation
-    p1 = Point(lon1, lat1)
-    p2 = Point(lon2, lat2)
-    gdf1 = gpd.GeoDataFrame([1], geometry=[p1], crs="EPSG:4326")
-    gdf2 = gpd.GeoDataFrame([1], geometry=[p2], crs="EPSG:4326")
+    if approx:
+        # Cheap ruler: scale degrees to meters with the ellipsoid's local radii
+        cos_lat = math.cos(math.radians((lat1 + lat2) / 2))
+        w2 = 1 / (1 - _RULER_E2 * (1 - cos_lat * cos_lat))
+        w = math.sqrt(w2)
+        kx = math.radians(_RULER_M_PER_RAD) * w * cos_lat
+        ky = math.radians(_RULER_M_PER_RAD) * w * w2 * (1 - _RULER_E2)
+        dlon = (lon2 - lon1 + 180) % 360 - 180
+        return math.hypot(dlon * kx, (lat2 - lat1) * ky)
 
-    # Project to equal-area CRS
-    gdf1_proj = gdf1.to_crs("EPSG:6933")
-    gdf2_proj = gdf2.to_crs("EPSG:6933")
-
-    return gdf1_proj.geometry.distance(gdf2_proj.geometry).values[0]
+    _, _, distance = _GEOD.inv(lon1, lat1, lon2, lat2)
+    return distance
 
 
 async def snap_pour_point(lat: float, lon: float, radius: int = 100) -> Dict:
@@ -110,6 +320,93 @@ async def snap_pour_point(lat: float, lon: float, radius: int = 100) -> Dict:
     return await asyncio.to_thread(_snap_pour_point_sync, lat, lon, radius)
 
 
+async def snap_pour_points_batch(
+    points: List[Tuple[float, float]], radius: int = 100
+) -> List[Dict]:
+    """
+    Async wrapper around the batched pour-point snapping routine.
+    """
+    return await asyncio.to_thread(_snap_pour_points_batch_sync, points, radius)
+
+
+def _unsnapped_feature(lat: float, lon: float, reason: str) -> Dict:
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [lon, lat]
+        },
+        "properties": {
+            "snapped": False,
+            "original_lat": lat,
+            "original_lon": lon,
+            "reason": reason
+        }
+    }
+
+
+def _snapped_feature(
+    lat: float, lon: float, snapped_lat: float, snapped_lon: float,
+    snap_distance: float, max_accumulation: float
+) -> Dict:
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [snapped_lon, snapped_lat]
+        },
+        "properties": {
+            "snapped": True,
+            "original_lat": lat,
+            "original_lon": lon,
+            "snap_distance_m": float(snap_distance),
+            "flow_accumulation": max_accumulation
+        }
+    }
+
+
+def _find_max_accumulation(
+    src: rasterio.io.DatasetReader, row: int, col: int, pixel_radius: int
+) -> Optional[Tuple[int, int, float]]:
+    """
+    Find the highest flow accumulation cell in a square window around a pixel.
+
+    Args:
+        src: Open flow accumulation dataset
+        row: Row index of the search center
+        col: Column index of the search center
+        pixel_radius: Search radius in pixels
+
+    Returns:
+        Tuple of (row, col, accumulation), or None if the window holds no valid data
+    """
+    # Define search window
+    row_min = max(0, row - pixel_radius)
+    row_max = min(src.height, row + pixel_radius + 1)
+    col_min = max(0, col - pixel_radius)
+    col_max = min(src.width, col + pixel_radius + 1)
+    if row_max <= row_min or col_max <= col_min:
+        return None
+
+    # Read flow accumulation window
+    window = rasterio.windows.Window(
+        col_min, row_min,
+        col_max - col_min, row_max - row_min
+    )
+    flow_acc = src.read(1, window=window)
+
+    if flow_acc.size == 0 or np.all(flow_acc == src.nodata):
+        return None
+
+    # Mask nodata values
+    if src.nodata is not None:
+        flow_acc = np.ma.masked_equal(flow_acc, src.nodata)
+
+    # Find cell with maximum accumulation
+    max_idx = np.unravel_index(np.ma.argmax(flow_acc), flow_acc.shape)
+    return row_min + int(max_idx[0]), col_min + int(max_idx[1]), float(flow_acc[max_idx])
+
+
 def _snap_pour_point_sync(lat: float, lon: float, radius: int = 100) -> Dict:
     """
     Snap a pour point to the nearest high-accumulation cell within a given radius.
@@ -126,99 +423,121 @@ def _snap_pour_point_sync(lat: float, lon: float, radius: int = 100) -> Dict:
     flow_acc_path = Path(settings.FLOW_ACC_PATH)
     if not flow_acc_path.exists():
         # Return original point if no flow accumulation available
-        return {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [lon, lat]
-            },
-            "properties": {
-                "snapped": False,
-                "original_lat": lat,
-                "original_lon": lon,
-                "reason": "Flow accumulation file not found"
-            }
-        }
+        return _unsnapped_feature(lat, lon, "Flow accumulation file not found")
 
-    with rasterio.open(flow_acc_path) as src:
-        # Transform coordinates from WGS84 to raster CRS
-        x, y = transform_coordinates_to_raster_crs(lon, lat, src.crs)
+    src, meta = _get_raster(flow_acc_path)
+    # Transform coordinates from WGS84 to raster CRS (no-op for WGS84 rasters)
+    x, y = _to_raster_crs(lon, lat, meta)
 
-        # Convert to raster row/col
-        row, col = rowcol(src.transform, x, y)
+    # Convert to raster row/col
+    row, col = src.index(x, y)
 
-        # Calculate pixel radius based on raster resolution and CRS
-        pixel_radius = calculate_snap_radius_pixels(
-            radius, src.crs, lon, lat, src.res
-        )
+    # Calculate pixel radius based on raster resolution and CRS
+    pixel_radius = _snap_radius_pixels(
+        radius, meta.is_wgs84, lat, meta.pixel_size_min
+    )
 
-        # Define search window
-        row_min = max(0, row - pixel_radius)
-        row_max = min(src.height, row + pixel_radius + 1)
-        col_min = max(0, col - pixel_radius)
-        col_max = min(src.width, col + pixel_radius + 1)
+    # Find maximum accumulation cell in window
+    hit = _find_max_accumulation(src, row, col, pixel_radius)
+    if hit is None:
+        # No valid data in window, return original point
+        return _unsnapped_feature(lat, lon, "No valid flow accumulation data in search radius")
+    snapped_row, snapped_col, max_accumulation = hit
 
-        # Read flow accumulation window
-        window = rasterio.windows.Window(
-            col_min, row_min,
-            col_max - col_min, row_max - row_min
-        )
-        flow_acc = src.read(1, window=window)
-
-        # Find maximum accumulation cell in window
-        if flow_acc.size == 0 or np.all(flow_acc == src.nodata):
-            # No valid data in window, return original point
-            return {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [lon, lat]
-                },
-                "properties": {
-                    "snapped": False,
-                    "original_lat": lat,
-                    "original_lon": lon,
-                    "reason": "No valid flow accumulation data in search radius"
-                }
-            }
-
-        # Mask nodata values
-        if src.nodata is not None:
-            flow_acc = np.ma.masked_equal(flow_acc, src.nodata)
-
-        # Find cell with maximum accumulation
-        max_idx = np.unravel_index(np.ma.argmax(flow_acc), flow_acc.shape)
-        snapped_row = row_min + max_idx[0]
-        snapped_col = col_min + max_idx[1]
-
-        # Convert back to raster CRS coordinates
-        snapped_x, snapped_y = src.xy(snapped_row, snapped_col)
-        max_accumulation = float(flow_acc[max_idx])
-
-        # Transform snapped coordinates back to WGS84
-        if src.crs == CRS.from_epsg(4326):
-            snapped_lon, snapped_lat = snapped_x, snapped_y
-        else:
-            transformer = Transformer.from_crs(src.crs, "EPSG:4326", always_xy=True)
-            snapped_lon, snapped_lat = transformer.transform(snapped_x, snapped_y)
+    # Convert back to raster CRS coordinates (pixel center) via the cached affine
+    snapped_x, snapped_y = meta.transform * (snapped_col + 0.5, snapped_row + 0.5)
+
+    # Transform snapped coordinates back to WGS84 (no-op for WGS84 rasters)
+    snapped_lon, snapped_lat = _to_wgs84(snapped_x, snapped_y, meta)
 
     # Calculate accurate distance in meters
     snap_distance = calculate_distance_meters(lon, lat, snapped_lon, snapped_lat)
 
-    return {
-        "type": "Feature",
-        "geometry": {
-            "type": "Point",
-            "coordinates": [snapped_lon, snapped_lat]
-        },
-        "properties": {
-            "snapped": True,
-            "original_lat": lat,
-            "original_lon": lon,
-            "snap_distance_m": float(snap_distance),
-            "flow_accumulation": max_accumulation
-        }
-    }
+    return _snapped_feature(lat, lon, snapped_lat, snapped_lon, snap_distance, max_accumulation)
+
+
+def _snap_pour_points_batch_sync(
+    points: List[Tuple[float, float]], radius: int = 100
+) -> List[Dict]:
+    """
+    Snap many pour points against the flow accumulation raster in one pass.
+
+    The raster handle and transformers are resolved once, coordinate
+    transforms and pixel lookups run on NumPy arrays, and window reads go
+    through the shared dataset handle so overlapping windows are served from
+    GDAL's block cache.
+
+    Args:
+        points: Sequence of (lat, lon) tuples in WGS84
+        radius: Search radius in meters
+
+    Returns:
+        List of GeoJSON Features, in the same order as ``points``
+    """
+    if not points:
+        return []
+
+    flow_acc_path = Path(settings.FLOW_ACC_PATH)
+    if not flow_acc_path.exists():
+        return [
+            _unsnapped_feature(lat, lon, "Flow accumulation file not found")
+            for lat, lon in points
+        ]
+
+    src, meta = _get_raster(flow_acc_path)
+    lats = np.array([p[0] for p in points], dtype=np.float64)
+    lons = np.array([p[1] for p in points], dtype=np.float64)
+
+    # Transform all coordinates and convert to pixel indices in one call each
+    if meta.is_wgs84:
+        xs, ys = lons, lats
+    else:
+        xs, ys = _get_transformer("EPSG:4326", meta.crs_wkt).transform(lons, lats)
+    rows, cols = _rowcol_batch(meta.transform, xs, ys)
+
+    pixel_radii = _snap_radius_pixels_batch(radius, meta.is_wgs84, lats, meta.pixel_size_min)
+    hits: List[Optional[Tuple[int, int, float]]] = [
+        _find_max_accumulation(src, row, col, pixel_radius)
+        for row, col, pixel_radius in zip(rows.tolist(), cols.tolist(), pixel_radii.tolist())
+    ]
+
+    snapped_idx = [i for i, hit in enumerate(hits) if hit is not None]
+    snapped_lons = np.empty(0)
+    snapped_lats = np.empty(0)
+    distances = np.empty(0)
+    if snapped_idx:
+        # Pixel centers back to WGS84 in one reverse transform
+        snapped_rows = np.array([hits[i][0] for i in snapped_idx], dtype=np.float64)
+        snapped_cols = np.array([hits[i][1] for i in snapped_idx], dtype=np.float64)
+        t = meta.transform
+        snapped_xs = t.a * (snapped_cols + 0.5) + t.b * (snapped_rows + 0.5) + t.c
+        snapped_ys = t.d * (snapped_cols + 0.5) + t.e * (snapped_rows + 0.5) + t.f
+        if meta.is_wgs84:
+            snapped_lons, snapped_lats = snapped_xs, snapped_ys
+        else:
+            snapped_lons, snapped_lats = _get_transformer(meta.crs_wkt, "EPSG:4326").transform(
+                snapped_xs, snapped_ys
+            )
+
+        # Geodesic distances for all points in one call
+        _, _, distances = _GEOD.inv(
+            lons[snapped_idx], lats[snapped_idx], snapped_lons, snapped_lats
+        )
+
+    snapped_pos = {i: k for k, i in enumerate(snapped_idx)}
+    features = []
+    for i, (lat, lon) in enumerate(zip(lats.tolist(), lons.tolist())):
+        k = snapped_pos.get(i)
+        if k is None:
+            features.append(
+                _unsnapped_feature(lat, lon, "No valid flow accumulation data in search radius")
+            )
+        else:
+            features.append(_snapped_feature(
+                lat, lon, float(snapped_lats[k]), float(snapped_lons[k]),
+                distances[k], hits[i][2]
+            ))
+    return features
 
 
 async def delineate_watershed(lat: float, lon: float) -> Dict:
@@ -236,45 +555,68 @@ async def delineate_watershed(lat: float, lon: float) -> Dict:
     if not flow_dir_path.exists():
         raise FileNotFoundError(f"Flow direction file not found: {flow_dir_path}")
 
-    with rasterio.open(flow_dir_path) as flow_dir_src:
-        # Transform pour point from WGS84 to raster CRS
-        x, y = transform_coordinates_to_raster_crs(lon, lat, flow_dir_src.crs)
+    flow_dir_src, flow_dir_meta = _get_raster(flow_dir_path)
 
-        # Convert to raster row/col
-        row, col = rowcol(flow_dir_src.transform, x, y)
+    # Transform pour point from WGS84 to raster CRS
+    x, y = _to_raster_crs(lon, lat, flow_dir_meta)
 
-        if row < 0 or row >= flow_dir_src.height or col < 0 or col >= flow_dir_src.width:
-            raise ValueError("Pour point is outside the DEM extent")
+    # Convert to raster row/col
+    row, col = flow_dir_src.index(x, y)
 
-        # Read flow direction
-        flow_dir = flow_dir_src.read(1)
+    if row < 0 or row >= flow_dir_src.height or col < 0 or col >= flow_dir_src.width:
+        raise ValueError("Pour point is outside the DEM extent")
 
-        # Trace watershed using D8 flow direction
-        # D8 flow direction values: 1=E, 2=SE, 4=S, 8=SW, 16=W, 32=NW, 64=N, 128=NE
+    # Read flow direction
+    flow_dir = flow_dir_src.read(1)
+
+    # Trace watershed using D8 flow direction
+    # D8 flow direction values: 1=E, 2=SE, 4=S, 8=SW, 16=W, 32=NW, 64=N, 128=NE
+    if settings.USE_GPU and cupy is not None:
+        watershed_mask = trace_watershed_d8_gpu(flow_dir, row, col, flow_dir_src.nodata)
+    else:
         watershed_mask = trace_watershed_d8(flow_dir, row, col, flow_dir_src.nodata)
 
-        # Convert mask to polygon
-        watershed_polygons = []
-        for geom, value in shapes(
-            watershed_mask.astype(np.uint8),
-            mask=(watershed_mask == 1),
-            transform=flow_dir_src.transform
-        ):
-            if value == 1:
-                watershed_polygons.append(shape(geom))
+    return await _build_watershed_result(watershed_mask, flow_dir_meta)
+
+
+async def _build_watershed_result(watershed_mask: np.ndarray, meta: _RasterMeta) -> Dict:
+    """
+    Polygonize a traced watershed mask and attach its statistics.
 
-        if not watershed_polygons:
-            raise ValueError("Could not delineate watershed - no contributing area found")
+    Args:
+        watershed_mask: Binary uint8 mask covering the full raster
+        meta: Metadata of the raster the mask was traced on
 
-        # Merge polygons if multiple
+    Returns:
+        Dictionary with watershed GeoJSON and statistics
+    """
+    # Convert mask to polygon (0/1 uint8 mask viewed as bool, no copy)
+    watershed_polygons = []
+    for geom, value in shapes(
+        watershed_mask,
+        mask=watershed_mask.view(bool),
+        transform=meta.transform
+    ):
+        if value == 1:
+            watershed_polygons.append(shape(geom))
+
+    if not watershed_polygons:
+        raise ValueError("Could not delineate watershed - no contributing area found")
+
+    # Merge polygons if multiple. shapes() polygonizes with 4-connectivity, so
+    # cells joined only diagonally by D8 flow can still come back as separate parts
+    if len(watershed_polygons) == 1:
+        watershed_geom = watershed_polygons[0]
+    else:
         watershed_geom = unary_union(watershed_polygons)
 
-        # Calculate statistics
-        statistics = await calculate_watershed_statistics(
-            watershed_geom=watershed_geom,
-            watershed_mask=watershed_mask,
-            crs=flow_dir_src.crs
-        )
+    # Calculate statistics
+    statistics = await calculate_watershed_statistics(
+        watershed_geom=watershed_geom,
+        watershed_mask=watershed_mask,
+        crs=meta.crs,
+        transform=meta.transform
+    )
 
     return {
         "watershed": {
@@ -286,10 +628,100 @@ async def delineate_watershed(lat: float, lon: float) -> Dict:
     }
 
 
+async def delineate_watersheds_batch(points: List[Tuple[float, float]]) -> List[Dict]:
+    """
+    Delineate watersheds for many pour points against one flow direction read.
+
+    Outlets are traced in parallel chunks with the Numba kernel when numba is
+    installed, and one at a time with ``trace_watershed_d8`` otherwise. Each
+    chunk's masks are polygonized and summarised before the next chunk is
+    traced, so peak memory stays at one mask per worker thread.
+
+    Args:
+        points: Sequence of (lat, lon) tuples in WGS84 (should be snapped)
+
+    Returns:
+        List with one entry per point, in order: the same dictionary as
+        ``delineate_watershed``, or ``{"error": message}`` if that point failed
+    """
+    if not points:
+        return []
+
+    flow_dir_path = Path(settings.FLOW_DIR_PATH)
+    if not flow_dir_path.exists():
+        raise FileNotFoundError(f"Flow direction file not found: {flow_dir_path}")
+
+    flow_dir_src, flow_dir_meta = _get_raster(flow_dir_path)
+    flow_dir = flow_dir_src.read(1)
+    nodata = flow_dir_src.nodata
+
+    lats = np.array([p[0] for p in points], dtype=np.float64)
+    lons = np.array([p[1] for p in points], dtype=np.float64)
+    if flow_dir_meta.is_wgs84:
+        xs, ys = lons, lats
+    else:
+        xs, ys = _get_transformer("EPSG:4326", flow_dir_meta.crs_wkt).transform(lons, lats)
+    rows, cols = _rowcol_batch(flow_dir_meta.transform, xs, ys)
+
+    height, width = flow_dir.shape
+    inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    results: List[Dict] = [
+        {"error": "Pour point is outside the DEM extent"} for _ in points
+    ]
+    valid = np.flatnonzero(inside)
+
+    if numba is not None:
+        state = _pack_d8_state(flow_dir, nodata)
+        chunk_size = numba.get_num_threads()
+    else:
+        chunk_size = 1
+
+    for start in range(0, len(valid), chunk_size):
+        idx = valid[start:start + chunk_size]
+        if numba is not None:
+            masks = await asyncio.to_thread(_trace_packed_batch, state, rows[idx], cols[idx])
+        else:
+            masks = [trace_watershed_d8(flow_dir, int(rows[i]), int(cols[i]), nodata) for i in idx]
+
+        for i, watershed_mask in zip(idx, masks):
+            try:
+                results[i] = await _build_watershed_result(watershed_mask, flow_dir_meta)
+            except ValueError as e:
+                results[i] = {"error": str(e)}
+
+    return results
+
+
 def trace_watershed_d8(flow_dir: np.ndarray, outlet_row: int, outlet_col: int, nodata: Optional[float] = None) -> np.ndarray:
     """
     Trace watershed upstream from outlet using D8 flow direction.
 
+    Uses the compiled Numba flood fill when the optional ``numba`` package is
+    installed, and a pure Python BFS otherwise.
+
+    Args:
+        flow_dir: D8 flow direction array
+        outlet_row: Row index of outlet
+        outlet_col: Column index of outlet
+        nodata: NoData value in flow direction array
+
+    Returns:
+        Binary mask where 1 = in watershed, 0 = outside
+    """
+    if numba is not None:
+        state = _pack_d8_state(flow_dir, nodata)
+        _trace_one_jit(state, outlet_row, outlet_col)
+        return state >> 7
+
+    return _trace_watershed_bfs(flow_dir, outlet_row, outlet_col, nodata)
+
+
+def _trace_watershed_bfs(
+    flow_dir: np.ndarray, outlet_row: int, outlet_col: int, nodata: Optional[float] = None
+) -> np.ndarray:
+    """
+    Pure Python BFS trace, used when numba is not installed.
+
     Args:
         flow_dir: D8 flow direction array
         outlet_row: Row index of outlet
@@ -300,7 +732,7 @@ def trace_watershed_d8(flow_dir: np.ndarray, outlet_row: int, outlet_col: int, n
         Binary mask where 1 = in watershed, 0 = outside
     """
     rows, cols = flow_dir.shape
-    watershed = np.zeros((rows, cols), dtype=bool)
+    watershed = np.zeros((rows, cols), dtype=np.uint8)
 
     # D8 flow direction lookup: direction value -> (row_offset, col_offset)
     d8_lookup = {
@@ -328,7 +760,7 @@ def trace_watershed_d8(flow_dir: np.ndarray, outlet_row: int, outlet_col: int, n
 
     # Breadth-first search to find all cells that flow to the outlet
     queue = deque([(outlet_row, outlet_col)])
-    watershed[outlet_row, outlet_col] = True
+    watershed[outlet_row, outlet_col] = 1
 
     while queue:
         r, c = queue.popleft()
@@ -352,43 +784,332 @@ def trace_watershed_d8(flow_dir: np.ndarray, outlet_row: int, outlet_col: int, n
             # Check if this neighbor flows to current cell
             neighbor_flow_dir = flow_dir[nr, nc]
             if neighbor_flow_dir == reverse_lookup.get(direction):
-                watershed[nr, nc] = True
+                watershed[nr, nc] = 1
                 queue.append((nr, nc))
 
-    return watershed.astype(np.uint8)
+    return watershed
+
+
+# D8 flow direction value -> (row_offset, col_offset) of the downstream cell
+_D8_OFFSETS = {
+    1: (0, 1),     # E
+    2: (1, 1),     # SE
+    4: (1, 0),     # S
+    8: (1, -1),    # SW
+    16: (0, -1),   # W
+    32: (-1, -1),  # NW
+    64: (-1, 0),   # N
+    128: (-1, 1)   # NE
+}
+
+
+def _trace_watershed_sweep(
+    xp, flow_dir, outlet_row: int, outlet_col: int, nodata: Optional[float] = None
+):
+    """
+    Trace a watershed by repeated whole-raster sweeps instead of a BFS.
+
+    Each cell's downstream neighbour is resolved once; every sweep then adds
+    the cells whose downstream neighbour is already in the watershed, until
+    nothing changes. Every cell is independent within a sweep, so the work
+    maps directly onto array backends such as CuPy.
+
+    Args:
+        xp: Array module (numpy or cupy)
+        flow_dir: D8 flow direction array
+        outlet_row: Row index of outlet
+        outlet_col: Column index of outlet
+        nodata: NoData value in flow direction array
+
+    Returns:
+        Flat boolean mask on the ``xp`` backend
+    """
+    flow_dir = xp.asarray(flow_dir)
+    rows, cols = flow_dir.shape
+    index_dtype = xp.int32 if rows * cols < 2**31 else xp.int64
+
+    r = xp.arange(rows, dtype=index_dtype).reshape(-1, 1)
+    c = xp.arange(cols, dtype=index_dtype).reshape(1, -1)
+    downstream = xp.full((rows, cols), -1, dtype=index_dtype)
+    for direction, (dr, dc) in _D8_OFFSETS.items():
+        nr = r + dr
+        nc = c + dc
+        in_bounds = (nr >= 0) & (nr < rows) & (nc >= 0) & (nc < cols)
+        downstream = xp.where((flow_dir == direction) & in_bounds, nr * cols + nc, downstream)
+    if nodata is not None:
+        downstream = xp.where(flow_dir == nodata, -1, downstream)
+
+    downstream = downstream.ravel()
+    has_downstream = downstream >= 0
+    downstream = xp.where(has_downstream, downstream, 0)
+
+    mask = xp.zeros(rows * cols, dtype=bool)
+    mask[outlet_row * cols + outlet_col] = True
+    while True:
+        grown = mask | (has_downstream & mask[downstream])
+        if not bool((grown != mask).any()):
+            return mask
+        mask = grown
+
+
+def trace_watershed_d8_gpu(
+    flow_dir: np.ndarray, outlet_row: int, outlet_col: int, nodata: Optional[float] = None
+) -> np.ndarray:
+    """
+    Trace watershed upstream from outlet on a CUDA device using CuPy.
+
+    Same result as ``trace_watershed_d8``; intended for large DEMs where the
+    serial BFS dominates delineation time. Requires the optional ``cupy``
+    package and ``USE_GPU=true``.
+
+    Args:
+        flow_dir: D8 flow direction array
+        outlet_row: Row index of outlet
+        outlet_col: Column index of outlet
+        nodata: NoData value in flow direction array
+
+    Returns:
+        Binary mask where 1 = in watershed, 0 = outside
+    """
+    if cupy is None:
+        raise RuntimeError("GPU tracing requested but cupy package is not installed.")
+
+    mask = _trace_watershed_sweep(cupy, flow_dir, outlet_row, outlet_col, nodata)
+    return cupy.asnumpy(mask).reshape(flow_dir.shape).view(np.uint8)
+
+
+# Packed per-cell trace state: bit 7 = in watershed, bit 6 = cannot drain
+# (nodata or not a D8 code), bits 0-2 = index of the D8 direction in _D8_OFFSETS
+_STATE_VISITED = 0x80
+_STATE_BLOCKED = 0x40
+_STATE_DIRECTION = 0x07
+
+
+def _pack_d8_state(flow_dir: np.ndarray, nodata: Optional[float] = None) -> np.ndarray:
+    """
+    Pack flow direction and nodata into one uint8 byte per cell.
+
+    The trace kernels then touch a single byte per neighbour probe instead of
+    a flow direction value, a nodata comparison, and a separate visited mask.
+
+    Args:
+        flow_dir: D8 flow direction array
+        nodata: NoData value in flow direction array
+
+    Returns:
+        uint8 state array with the same shape as ``flow_dir``
+    """
+    state = np.full(flow_dir.shape, _STATE_BLOCKED, dtype=np.uint8)
+    for index, direction in enumerate(_D8_OFFSETS):
+        state[flow_dir == direction] = index
+    if nodata is not None:
+        state[flow_dir == nodata] = _STATE_BLOCKED
+    return state
+
+
+# Row/col offsets of the 8 D8 neighbours, index-aligned with _D8_OFFSETS. The
+# neighbour at offset k drains into the centre cell when its direction index
+# is (k + 4) % 8, i.e. it points back the opposite way.
+_NEIGHBOR_DR = np.array([dr for dr, _ in _D8_OFFSETS.values()], dtype=np.int64)
+_NEIGHBOR_DC = np.array([dc for _, dc in _D8_OFFSETS.values()], dtype=np.int64)
+
+
+if numba is not None:
+    @numba.njit(nogil=True, cache=True, error_model='numpy')
+    def _trace_one_jit(state, outlet_row, outlet_col):
+        # Works on the flattened grid: neighbours are fixed index deltas and
+        # the row/col bounds are only checked against the popped cell
+        rows, cols = state.shape
+        flat = state.ravel()
+        deltas = _NEIGHBOR_DR * cols + _NEIGHBOR_DC
+        stack = np.empty(1024, dtype=np.int64)
+        stack[0] = outlet_row * cols + outlet_col
+        top = 1
+        flat[stack[0]] |= _STATE_VISITED
+
+        while top > 0:
+            top -= 1
+            idx = stack[top]
+            r = idx // cols
+            c = idx - r * cols
+
+            for k in range(8):
+                dr = _NEIGHBOR_DR[k]
+                dc = _NEIGHBOR_DC[k]
+                if (dr < 0 and r == 0) or (dr > 0 and r == rows - 1):
+                    continue
+                if (dc < 0 and c == 0) or (dc > 0 and c == cols - 1):
+                    continue
+                n = idx + deltas[k]
+                s = flat[n]
+                if s & (_STATE_VISITED | _STATE_BLOCKED):
+                    continue
+                if (s & _STATE_DIRECTION) == (k + 4) % 8:
+                    flat[n] = s | _STATE_VISITED
+                    if top == stack.shape[0]:
+                        grown = np.empty(stack.shape[0] * 2, dtype=np.int64)
+                        grown[:top] = stack
+                        stack = grown
+                    stack[top] = n
+                    top += 1
+
+    @numba.njit(parallel=True, nogil=True, cache=True)
+    def _trace_many_jit(state, outlet_rows, outlet_cols, out_masks):
+        for i in numba.prange(outlet_rows.shape[0]):
+            local = out_masks[i]
+            local[:] = state
+            _trace_one_jit(local, outlet_rows[i], outlet_cols[i])
+            # Keep only the visited bit, as 0/1
+            flat = local.ravel()
+            for j in range(flat.shape[0]):
+                flat[j] = flat[j] >> 7
+
+
+def _trace_packed_batch(
+    state: np.ndarray, outlet_rows: np.ndarray, outlet_cols: np.ndarray
+) -> np.ndarray:
+    out_masks = np.empty((len(outlet_rows),) + state.shape, dtype=np.uint8)
+    _trace_many_jit(
+        state,
+        np.asarray(outlet_rows, dtype=np.int64),
+        np.asarray(outlet_cols, dtype=np.int64),
+        out_masks
+    )
+    return out_masks
+
+
+def trace_watersheds_d8_batch(
+    flow_dir: np.ndarray,
+    outlet_rows: np.ndarray,
+    outlet_cols: np.ndarray,
+    nodata: Optional[float] = None
+) -> np.ndarray:
+    """
+    Trace several watersheds on a shared flow direction grid in parallel.
+
+    Each outlet is traced on its own thread by a Numba kernel. Requires the
+    optional ``numba`` package.
+
+    Args:
+        flow_dir: D8 flow direction array
+        outlet_rows: Row indices of outlets
+        outlet_cols: Column indices of outlets
+        nodata: NoData value in flow direction array
+
+    Returns:
+        Array of shape (n_outlets, rows, cols); 1 = in watershed, 0 = outside
+    """
+    if numba is None:
+        raise RuntimeError("Batch tracing requested but numba package is not installed.")
+
+    return _trace_packed_batch(_pack_d8_state(flow_dir, nodata), outlet_rows, outlet_cols)
+
+
+def _project_to_equal_area(geom, crs):
+    """Project a geometry to EPSG:6933 (Equal Earth) with a cached transformer."""
+    transformer = _get_transformer(_crs_info(crs)[0], "EPSG:6933")
+    return shapely.transform(
+        geom, lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+    )
+
+
+# WGS84 ellipsoid semi-major axis (m) and first eccentricity
+_WGS84_A = 6378137.0
+_WGS84_E = 0.0818191908426215
+
+
+def _authalic_q(lat_rad: np.ndarray) -> np.ndarray:
+    """Snyder's q(phi); the ellipsoid area between two parallels is a^2/2 * dlon * dq."""
+    e = _WGS84_E
+    sin_lat = np.sin(lat_rad)
+    return (1 - e ** 2) * (
+        sin_lat / (1 - (e * sin_lat) ** 2)
+        - np.log((1 - e * sin_lat) / (1 + e * sin_lat)) / (2 * e)
+    )
+
+
+def _mask_area_m2(watershed_mask: np.ndarray, crs, transform: Affine) -> Optional[float]:
+    """
+    Compute the ground area covered by a raster mask from its cell count.
+
+    Projected rasters multiply the cell count by the pixel area. North-up
+    geographic rasters sum per-row cell counts weighted by the area of a cell
+    at that row's latitude on the WGS84 ellipsoid. Rotated geographic rasters return None.
+
+    Args:
+        watershed_mask: Binary mask covering the full raster
+        crs: Raster CRS
+        transform: Raster affine transform
+
+    Returns:
+        Area in square meters, or None if it cannot be derived from the grid
+    """
+    if crs.is_projected:
+        unit_factor = crs.linear_units_factor[1]
+        pixel_area_m2 = abs(transform.a * transform.e - transform.b * transform.d) * unit_factor ** 2
+        return float(np.count_nonzero(watershed_mask)) * pixel_area_m2
+
+    if transform.b != 0 or transform.d != 0:
+        return None
+
+    cells_per_row = np.count_nonzero(watershed_mask, axis=1)
+    rows = np.flatnonzero(cells_per_row)
+    lat_edge_a = np.radians(transform.f + transform.e * rows)
+    lat_edge_b = np.radians(transform.f + transform.e * (rows + 1))
+    row_cell_area = (
+        _WGS84_A ** 2 / 2
+        * math.radians(abs(transform.a))
+        * np.abs(_authalic_q(lat_edge_a) - _authalic_q(lat_edge_b))
+    )
+    return float(np.sum(cells_per_row[rows] * row_cell_area))
 
 
 async def calculate_watershed_statistics(
     watershed_geom,
     watershed_mask: np.ndarray,
-    crs
+    crs,
+    transform: Optional[Affine] = None,
+    accurate_area: bool = False
 ) -> Dict:
     """
     Calculate statistics for a delineated watershed.
 
+    When the raster transform is given, area comes from the mask's cell count
+    and the ground area of each cell, so projected DEMs never reproject the
+    polygon. Pass ``accurate_area=True`` to measure the polygon in EPSG:6933
+    instead.
+
     Args:
         watershed_geom: Shapely geometry of watershed
         watershed_mask: Binary mask of watershed
         crs: Coordinate reference system
+        transform: Affine transform of the raster the mask was traced on
+        accurate_area: Measure area and perimeter on the reprojected polygon
 
     Returns:
         Dictionary of watershed statistics
     """
-    # Calculate area
-    # Transform to equal-area projection for accurate area calculation
-    gdf = gpd.GeoDataFrame([1], geometry=[watershed_geom], crs=crs)
-    gdf_area = gdf.to_crs("EPSG:6933")  # Equal Earth projection
-    area_m2 = gdf_area.geometry.area.values[0]
+    # Number of cells
+    num_cells = int(np.count_nonzero(watershed_mask))
+
+    area_m2 = None
+    if not accurate_area and transform is not None:
+        area_m2 = _mask_area_m2(watershed_mask, crs, transform)
+
+    if area_m2 is not None and crs.is_projected:
+        # Projected CRS: polygon length is already in linear units
+        perimeter_m = watershed_geom.length * crs.linear_units_factor[1]
+    else:
+        # Transform to equal-area projection for area and perimeter
+        geom_eq = _project_to_equal_area(watershed_geom, crs)
+        if area_m2 is None:
+            area_m2 = geom_eq.area
+        perimeter_m = geom_eq.length
+
     area_km2 = area_m2 / 1_000_000
     area_mi2 = area_m2 / 2_589_988
-
-    # Calculate perimeter
-    perimeter_m = gdf_area.geometry.length.values[0]
     perimeter_km = perimeter_m / 1000
 
-    # Number of cells
-    num_cells = int(np.sum(watershed_mask))
-
     statistics = {
         "area_km2": round(area_km2, 4),
         "area_mi2": round(area_mi2, 4),
@@ -402,21 +1123,21 @@ async def calculate_watershed_statistics(
     try:
         dem_path = Path(settings.DEM_PATH)
         if dem_path.exists():
-            with rasterio.open(dem_path) as dem_src:
-                # Read DEM values within watershed as a masked array to drop nodata efficiently
-                dem_data = dem_src.read(1, masked=True)
-                watershed_elevations = dem_data[np.asarray(watershed_mask, dtype=bool)]
-
-                if np.ma.is_masked(watershed_elevations):
-                    watershed_elevations = watershed_elevations.compressed()
-
-                if len(watershed_elevations) > 0:
-                    statistics.update({
-                        "elevation_min_m": float(np.min(watershed_elevations)),
-                        "elevation_max_m": float(np.max(watershed_elevations)),
-                        "elevation_mean_m": float(np.mean(watershed_elevations)),
-                        "elevation_std_m": float(np.std(watershed_elevations)),
-                    })
+            dem_src = _get_dataset(dem_path)
+            # Read DEM values within watershed as a masked array to drop nodata efficiently
+            dem_data = dem_src.read(1, masked=True)
+            watershed_elevations = dem_data[watershed_mask.view(bool)]
+
+            if np.ma.is_masked(watershed_elevations):
+                watershed_elevations = watershed_elevations.compressed()
+
+            if len(watershed_elevations) > 0:
+                statistics.update({
+                    "elevation_min_m": float(np.min(watershed_elevations)),
+                    "elevation_max_m": float(np.max(watershed_elevations)),
+                    "elevation_mean_m": float(np.mean(watershed_elevations)),
+                    "elevation_std_m": float(np.std(watershed_elevations)),
+                })
     except Exception as e:
         print(f"Warning: Could not calculate DEM statistics: {e}")
 
@@ -0,0 +1,73 @@
+import geopandas as gpd
+from shapely.geometry import LineString, Point
+
+from app.routes.features import _load_dataset_cached, query_features_with_fallback
+
+
+def _lines_gdf():
+    # Short east-west lines roughly 0.001 deg (~90-110 m) apart near Fairfax, VA
+    lines = [
+        LineString([(-77.300, 38.850), (-77.299, 38.850)]),
+        LineString([(-77.300, 38.852), (-77.299, 38.852)]),
+        LineString([(-77.300, 38.848), (-77.299, 38.848)]),
+        LineString([(-77.310, 38.860), (-77.309, 38.860)]),
+    ]
+    return gpd.GeoDataFrame({"name": ["a", "b", "c", "far"]}, geometry=lines, crs="EPSG:4326")
+
+
+def test_fallback_returns_intersecting_features():
+    gdf = _lines_gdf()
+    result, is_nearest = query_features_with_fallback(gdf, Point(-77.2995, 38.850), buffer_m=5)
+    assert not is_nearest
+    assert list(result["name"]) == ["a"]
+
+
+def test_fallback_finds_nearest_within_max_distance():
+    gdf = _lines_gdf()
+    # ~55 m north of "a", outside the buffer
+    result, is_nearest = query_features_with_fallback(
+        gdf, Point(-77.2995, 38.8505), buffer_m=5, max_distance_m=100
+    )
+    assert is_nearest
+    assert list(result["name"]) == ["a"]
+
+
+def test_fallback_returns_all_ties_in_original_order():
+    gdf = _lines_gdf()
+    # Duplicate of "a" placed after "far" ties exactly at the minimum distance
+    gdf = gpd.GeoDataFrame(
+        {"name": list(gdf["name"]) + ["a2"]},
+        geometry=list(gdf.geometry) + [gdf.geometry.iloc[0]],
+        crs=gdf.crs,
+    )
+    result, is_nearest = query_features_with_fallback(
+        gdf, Point(-77.2995, 38.8505), buffer_m=5, max_distance_m=100
+    )
+    assert is_nearest
+    assert list(result["name"]) == ["a", "a2"]
+
+
+def test_fallback_respects_max_distance():
+    gdf = _lines_gdf()
+    result, is_nearest = query_features_with_fallback(
+        gdf, Point(-77.2995, 38.8505), buffer_m=5, max_distance_m=10
+    )
+    assert not is_nearest
+    assert result.empty
+
+
+def test_fallback_reuses_cached_projection(tmp_path):
+    path = tmp_path / "lines.gpkg"
+    _lines_gdf().to_file(path, layer="lines")
+    gdf = _load_dataset_cached(str(path), "lines")
+
+    result, is_nearest = query_features_with_fallback(
+        gdf, Point(-77.2995, 38.8505), buffer_m=5, max_distance_m=100,
+        source=(str(path), "lines")
+    )
+    assert is_nearest
+    assert list(result["name"]) == ["a"]
+
+    projected = _load_dataset_cached(str(path), "lines", crs="EPSG:6933")
+    assert projected.crs == "EPSG:6933"
+    assert _load_dataset_cached(str(path), "lines", crs="EPSG:6933") is projected
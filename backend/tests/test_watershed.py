@@ -41,8 +41,15 @@ def test_calculate_snap_radius_pixels_wgs84():
 
 
 def test_calculate_distance_meters():
+    # 0.001 degrees of longitude at 37.5 degrees latitude on the WGS84 ellipsoid
     distance = calculate_distance_meters(-122.0, 37.5, -122.001, 37.5)
-    assert distance == pytest.approx(96.49, rel=1e-2)
+    assert distance == pytest.approx(88.43, rel=1e-3)
+
+
+def test_calculate_distance_meters_approx():
+    exact = calculate_distance_meters(-77.30, 38.85, -77.28, 38.87)
+    approx = calculate_distance_meters(-77.30, 38.85, -77.28, 38.87, approx=True)
+    assert approx == pytest.approx(exact, rel=1e-3)
 
 
 def test_trace_watershed_d8_simple():
@@ -58,4 +65,159 @@ def test_trace_watershed_d8_simple():
         [1, 1, 1],
         [0, 1, 0],
     ], dtype=np.uint8)
+    assert mask.dtype == np.uint8
     np.testing.assert_array_equal(mask, expected)
+
+
+def _write_raster(path, data, transform, crs="EPSG:4326", nodata=None):
+    import rasterio
+
+    with rasterio.open(
+        path, "w", driver="GTiff", height=data.shape[0], width=data.shape[1],
+        count=1, dtype=data.dtype, crs=crs, transform=transform, nodata=nodata,
+    ) as dst:
+        dst.write(data[np.newaxis])
+    return path
+
+
+def test_get_dataset_reuses_handle(tmp_path):
+    from rasterio.transform import from_origin
+    from app.services.watershed import _get_dataset, close_datasets
+
+    path = _write_raster(
+        tmp_path / "flow_acc.tif", np.ones((2, 2), dtype=np.uint8), from_origin(0, 2, 1, 1)
+    )
+
+    first = _get_dataset(path)
+    assert _get_dataset(path) is first
+
+    close_datasets()
+    assert first.closed
+    assert _get_dataset(path) is not first
+    close_datasets()
+
+
+def test_rowcol_batch_matches_rowcol():
+    from rasterio.transform import from_origin, rowcol
+    from app.services.watershed import _rowcol_batch
+
+    transform = from_origin(-77.5, 39.0, 0.001, 0.001)
+    xs = np.array([-77.4995, -77.3, -77.6])
+    ys = np.array([38.9995, 38.95, 39.1])
+    rows, cols = _rowcol_batch(transform, xs, ys)
+    for x, y, r, c in zip(xs, ys, rows, cols):
+        assert (r, c) == rowcol(transform, x, y)
+
+
+def test_snap_pour_points_batch_matches_single(tmp_path, monkeypatch):
+    from rasterio.transform import from_origin
+    from app.config import settings
+    from app.services.watershed import (
+        _snap_pour_point_sync,
+        _snap_pour_points_batch_sync,
+        close_datasets,
+    )
+
+    flow_acc = np.arange(400, dtype=np.float32).reshape(20, 20)
+    path = _write_raster(
+        tmp_path / "flow_acc.tif", flow_acc, from_origin(-77.3, 38.9, 0.0001, 0.0001), nodata=-1
+    )
+    monkeypatch.setattr(settings, "FLOW_ACC_PATH", str(path))
+
+    points = [(38.8995, -77.2995), (38.8985, -77.2990), (10.0, 10.0)]
+    batch = _snap_pour_points_batch_sync(points, radius=50)
+    single = [_snap_pour_point_sync(lat, lon, radius=50) for lat, lon in points]
+    close_datasets()
+
+    assert [f["properties"]["snapped"] for f in batch] == [True, True, False]
+    for b, s in zip(batch, single):
+        assert b["geometry"]["coordinates"] == pytest.approx(s["geometry"]["coordinates"])
+        assert b["properties"] == pytest.approx(s["properties"])
+
+
+def test_trace_watershed_sweep_matches_bfs():
+    from app.services.watershed import _trace_watershed_sweep
+
+    rng = np.random.default_rng(0)
+    codes = np.array([0, 1, 2, 4, 8, 16, 32, 64, 128], dtype=np.uint8)
+    flow_dir = rng.choice(codes, size=(40, 40)).astype(np.uint8)
+    # Funnel everything in the lower half toward an outlet in the bottom row
+    flow_dir[20:, :20] = 1
+    flow_dir[20:, 20:] = 16
+    flow_dir[39, :] = 4
+    flow_dir[20:39, 20] = 4
+
+    expected = trace_watershed_d8(flow_dir, outlet_row=39, outlet_col=20, nodata=0)
+    mask = _trace_watershed_sweep(np, flow_dir, 39, 20, nodata=0).reshape(flow_dir.shape)
+    np.testing.assert_array_equal(mask.view(np.uint8), expected)
+
+
+def test_mask_area_matches_polygon_area_geographic():
+    from rasterio.features import shapes
+    from rasterio.transform import from_origin
+    from shapely.geometry import shape
+    from app.services.watershed import _mask_area_m2, _project_to_equal_area
+
+    transform = from_origin(-77.3, 38.9, 0.0001, 0.0001)
+    mask = np.zeros((50, 50), dtype=np.uint8)
+    mask[5:45, 10:30] = 1
+    polygon = next(
+        shape(geom) for geom, value in shapes(mask, mask=mask.view(bool), transform=transform)
+        if value == 1
+    )
+    crs = CRS.from_epsg(4326)
+
+    expected = _project_to_equal_area(polygon, crs).area
+    assert _mask_area_m2(mask, crs, transform) == pytest.approx(expected, rel=1e-6)
+
+
+def test_mask_area_projected_is_cell_count_times_pixel_area():
+    from rasterio.transform import from_origin
+    from app.services.watershed import _mask_area_m2
+
+    mask = np.zeros((10, 10), dtype=np.uint8)
+    mask[2:5, 3:7] = 1
+    area = _mask_area_m2(mask, CRS.from_epsg(32618), from_origin(300000, 4300000, 10, 10))
+    assert area == pytest.approx(12 * 100.0)
+
+
+def test_trace_watersheds_d8_batch_matches_single():
+    pytest.importorskip("numba")
+    from app.services.watershed import trace_watersheds_d8_batch
+
+    rng = np.random.default_rng(1)
+    codes = np.array([0, 1, 2, 4, 8, 16, 32, 64, 128], dtype=np.uint8)
+    flow_dir = rng.choice(codes, size=(30, 30)).astype(np.uint8)
+    outlet_rows = np.array([0, 15, 29, 7])
+    outlet_cols = np.array([0, 15, 3, 22])
+
+    masks = trace_watersheds_d8_batch(flow_dir, outlet_rows, outlet_cols, nodata=0)
+    for mask, r, c in zip(masks, outlet_rows, outlet_cols):
+        np.testing.assert_array_equal(mask, trace_watershed_d8(flow_dir, r, c, nodata=0))
+
+
+def test_trace_watershed_d8_jit_matches_bfs():
+    pytest.importorskip("numba")
+    from app.services.watershed import _trace_watershed_bfs
+
+    rng = np.random.default_rng(2)
+    codes = np.array([0, 1, 2, 4, 8, 16, 32, 64, 128], dtype=np.uint8)
+    flow_dir = rng.choice(codes, size=(30, 30)).astype(np.uint8)
+    flow_dir[10:20, :15] = 1
+    flow_dir[10:20, 15] = 4
+
+    for r, c in [(19, 15), (0, 0), (29, 29), (12, 15)]:
+        np.testing.assert_array_equal(
+            trace_watershed_d8(flow_dir, r, c, nodata=0),
+            _trace_watershed_bfs(flow_dir, r, c, nodata=0)
+        )
+
+
+def test_snap_radius_pixels_batch_matches_scalar():
+    from app.services.watershed import _snap_radius_pixels, _snap_radius_pixels_batch
+
+    lats = np.array([0.0, 38.8, 60.0, 89.0])
+    for is_wgs84, pixel_size in [(True, 0.0001), (False, 3.0)]:
+        batch = _snap_radius_pixels_batch(100, is_wgs84, lats, pixel_size)
+        expected = [_snap_radius_pixels(100, is_wgs84, lat, pixel_size) for lat in lats]
+        assert batch.tolist() == expected
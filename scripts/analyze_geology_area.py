@@ -4,6 +4,8 @@ Analyze geology polygons around Mason District Park to understand feature select
 """
 
 import geopandas as gpd
+import numpy as np
+import shapely
 from shapely.geometry import Point, box
 import pandas as pd
 from pathlib import Path
@@ -19,27 +21,38 @@ bbox = box(center_lon - 0.01, center_lat - 0.01, center_lon + 0.01, center_lat +
 geology_path = Path("/Users/skh/source/hydro-map/data/processed/geology.gpkg")
 geology_gdf = gpd.read_file(geology_path, bbox=bbox)
 
+# Prepare the polygons once so every containment test below reuses the
+# prepared (indexed) edges instead of re-walking them per point
+geology_geoms = np.asarray(geology_gdf.geometry.values)
+shapely.prepare(geology_geoms)
+
 print(f"Found {len(geology_gdf)} geology features in the Mason District Park area")
 print(f"Bounding box: {bbox.bounds}")
 print("\n" + "="*80 + "\n")
 
-# Analyze each polygon
-for idx, row in geology_gdf.iterrows():
-    geom = row.geometry
-
-    # Calculate area in square kilometers
-    geom_proj = gpd.GeoSeries([geom], crs="EPSG:4326").to_crs("EPSG:6933")  # Equal Earth projection
-    area_sqm = geom_proj.area.values[0]
-    area_sqkm = area_sqm / 1_000_000
-
-    # Get bounds
-    minx, miny, maxx, maxy = geom.bounds
-    width_deg = maxx - minx
-    height_deg = maxy - miny
-
-    # Approximate dimensions in km (at this latitude)
-    width_km = width_deg * 111 * 0.788  # cos(38.8°) ≈ 0.788
-    height_km = height_deg * 111
+# Project once to an equal-area CRS and read all areas in square kilometers
+geology_proj = geology_gdf.to_crs("EPSG:6933")  # Equal Earth projection
+areas_sqkm = geology_proj.area.values / 1_000_000
+
+# Test every polygon against the clicked points in one vectorized pass;
+# contains_mx[i, j] is True when polygon i contains test point j
+test_points = shapely.points(np.array([
+    [-77.17720, 38.82938],  # First click
+    [-77.17652, 38.82963],  # Second click
+]))
+contains_mx = shapely.contains(geology_geoms[:, None], test_points[None, :])
+
+# Bounds and approximate dimensions in km (at this latitude) for all polygons
+bounds = shapely.bounds(geology_geoms)
+widths_km = (bounds[:, 2] - bounds[:, 0]) * 111 * 0.788  # cos(38.8°) ≈ 0.788
+heights_km = (bounds[:, 3] - bounds[:, 1]) * 111
+
+# Report each polygon; all geometry work is already done above
+for i, (idx, row) in enumerate(geology_gdf.drop(columns="geometry").iterrows()):
+    area_sqkm = areas_sqkm[i]
+    width_km = widths_km[i]
+    height_km = heights_km[i]
+    minx, miny, maxx, maxy = bounds[i]
 
     print(f"Feature {idx}: {row.get('unit', 'Unknown')}")
     print(f"  Rock Type: {row.get('rock_type', 'Unknown')}")
@@ -48,14 +61,8 @@ for idx, row in geology_gdf.iterrows():
     print(f"  Bounds: ({minx:.4f}, {miny:.4f}) to ({maxx:.4f}, {maxy:.4f})")
 
     # Check if specific test points are inside this polygon
-    test_points = [
-        Point(-77.17720, 38.82938),  # First click
-        Point(-77.17652, 38.82963),  # Second click
-    ]
-
-    for i, pt in enumerate(test_points, 1):
-        if geom.contains(pt):
-            print(f"  ✓ Contains test point {i}")
+    for j in np.flatnonzero(contains_mx[i]):
+        print(f"  ✓ Contains test point {j + 1}")
 
     print()
 
@@ -63,17 +70,16 @@ print("\n" + "="*80 + "\n")
 print("ANALYSIS SUMMARY:")
 print("-" * 40)
 
-# Find overlapping polygons
-overlaps = []
-for i in range(len(geology_gdf)):
-    for j in range(i+1, len(geology_gdf)):
-        geom1 = geology_gdf.iloc[i].geometry
-        geom2 = geology_gdf.iloc[j].geometry
-        if geom1.overlaps(geom2) or geom1.contains(geom2) or geom2.contains(geom1):
-            overlaps.append((
-                geology_gdf.iloc[i]['unit'],
-                geology_gdf.iloc[j]['unit']
-            ))
+# Find overlapping polygons (partial overlap or one containing the other)
+# through the spatial index instead of testing every pair
+pairs = np.hstack([
+    geology_gdf.sindex.query(geology_gdf.geometry, predicate=predicate)
+    for predicate in ("overlaps", "contains", "within")
+])
+pairs = np.sort(pairs, axis=0)
+pairs = np.unique(pairs[:, pairs[0] < pairs[1]], axis=1)
+units = geology_gdf['unit'].values
+overlaps = [(units[i], units[j]) for i, j in pairs.T]
 
 if overlaps:
     print(f"Found {len(overlaps)} overlapping polygon pairs:")
@@ -86,15 +92,15 @@ print("\n" + "-" * 40)
 
 # Check which polygons contain the test point
 test_point = Point(-77.17720, 38.82938)
-containing = geology_gdf[geology_gdf.contains(test_point)]
+candidates = np.sort(geology_gdf.sindex.query(test_point))
+containing_idx = candidates[shapely.contains(geology_geoms[candidates], test_point)]
+containing = geology_gdf.iloc[containing_idx]
 print(f"\nPolygons containing test point ({test_point.x}, {test_point.y}):")
 for idx, row in containing.iterrows():
     print(f"  - {row['unit']}: {row['rock_type']}")
 
 # Find the smallest polygon containing the test point
 if len(containing) > 0:
-    # Calculate areas for containing polygons
-    containing_proj = containing.to_crs("EPSG:6933")
-    containing['area_sqm'] = containing_proj.area
-    smallest = containing.nsmallest(1, 'area_sqm').iloc[0]
-    print(f"\nSmallest containing polygon: {smallest['unit']} ({smallest['area_sqm']/1_000_000:.2f} km²)")
\ No newline at end of file
+    smallest_pos = containing_idx[np.argmin(areas_sqkm[containing_idx])]
+    smallest = geology_gdf.iloc[smallest_pos]
+    print(f"\nSmallest containing polygon: {smallest['unit']} ({areas_sqkm[smallest_pos]:.2f} km²)")
\ No newline at end of file
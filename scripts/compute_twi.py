@@ -14,6 +14,9 @@ Usage:
 """
 
 import argparse
+import math
+import os
+import sys
 import numpy as np
 from pathlib import Path
 import warnings
@@ -21,12 +24,30 @@ warnings.filterwarnings('ignore')
 
 try:
     import rasterio
-    from rasterio.transform import Affine
+    from rasterio.enums import Resampling
+    from rasterio.vrt import WarpedVRT
 except ImportError:
     print("Required packages not installed. Please install:")
     print("pip install rasterio numpy")
     exit(1)
 
+# Add path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+from lib.raster_stats import (
+    TWI_HIST_MIN, TWI_HIST_MAX, TWI_HIST_BIN,
+    new_histogram, update_histogram, histogram_percentiles
+)
+
+# Block size shared by the aligned input VRTs and the tiled output
+BLOCK_SIZE = 512
+
+# GDAL block cache (MB) unless GDAL_CACHEMAX is already set in the environment
+GDAL_CACHEMAX_MB = 512
+
+# TWI is stored as int16 in thousandths; consumers apply twi = raster * 0.001
+TWI_SCALE = 0.001
+TWI_NODATA = -32768
+
 
 def compute_twi(
     flow_accum_path: Path,
@@ -38,6 +59,10 @@ def compute_twi(
     """
     Compute Topographic Wetness Index.
 
+    The rasters are processed one block at a time in float32, so peak memory
+    scales with the block size rather than the raster size. The output is
+    int16 scaled by 1000 (TWI = value * 0.001, nodata -32768).
+
     Args:
         flow_accum_path: Path to flow accumulation raster (number of cells)
         slope_deg_path: Path to slope raster (degrees)
@@ -45,81 +70,150 @@ def compute_twi(
         cell_size_m: Cell size in meters (default 1m)
         min_slope_deg: Minimum slope to avoid division by zero (default 0.01 degrees)
     """
-    print(f"Reading flow accumulation from {flow_accum_path}...")
-    with rasterio.open(flow_accum_path) as src:
-        flow_accum = src.read(1).astype(np.float64)
-        profile = src.profile.copy()
-        nodata_accum = src.nodata
+    # Scalar invariants, computed once for all blocks
+    min_rad = math.radians(min_slope_deg)
+    deg2rad_scale = math.pi / 180.0
+    log_cell_area = math.log(cell_size_m * cell_size_m)
+
+    hist = new_histogram(TWI_HIST_MIN, TWI_HIST_MAX, TWI_HIST_BIN)
+    count = 0
+    total = 0.0
+    total_sq = 0.0
+    twi_min = np.inf
+    twi_max = -np.inf
 
-    print(f"Reading slope from {slope_deg_path}...")
-    with rasterio.open(slope_deg_path) as src:
-        slope_deg = src.read(1).astype(np.float64)
-        nodata_slope = src.nodata
-
-    # Create mask for valid data
-    valid_mask = (
-        (flow_accum != nodata_accum if nodata_accum is not None else np.ones_like(flow_accum, dtype=bool)) &
-        (slope_deg != nodata_slope if nodata_slope is not None else np.ones_like(slope_deg, dtype=bool)) &
-        np.isfinite(flow_accum) &
-        np.isfinite(slope_deg) &
-        (flow_accum > 0)  # Need positive flow accumulation
-    )
-
-    print(f"Valid pixels: {np.sum(valid_mask):,} / {valid_mask.size:,}")
-
-    # Compute upslope contributing area (in square meters)
-    # flow_accum is in number of cells, multiply by cell area
-    cell_area_m2 = cell_size_m * cell_size_m
-    upslope_area_m2 = flow_accum * cell_area_m2
-
-    # Convert slope from degrees to radians
-    slope_rad = np.deg2rad(slope_deg)
-
-    # Apply minimum slope to avoid division by zero
-    slope_rad_safe = np.where(slope_rad < np.deg2rad(min_slope_deg), np.deg2rad(min_slope_deg), slope_rad)
-
-    # Compute TWI = ln(upslope_area / tan(slope))
-    # Only compute for valid pixels
-    twi = np.full_like(flow_accum, -9999.0, dtype=np.float32)
-
-    with np.errstate(divide='ignore', invalid='ignore'):
-        tan_slope = np.tan(slope_rad_safe)
-        ratio = upslope_area_m2 / tan_slope
-        # Only compute log where ratio is positive and finite
-        ratio_valid = valid_mask & (ratio > 0) & np.isfinite(ratio)
-        twi[ratio_valid] = np.log(ratio[ratio_valid])
-
-    # Report statistics
-    twi_valid = twi[ratio_valid]
-    print(f"\nTWI Statistics:")
-    print(f"  Min: {np.min(twi_valid):.3f}")
-    print(f"  Max: {np.max(twi_valid):.3f}")
-    print(f"  Mean: {np.mean(twi_valid):.3f}")
-    print(f"  Median: {np.median(twi_valid):.3f}")
-    print(f"  Std Dev: {np.std(twi_valid):.3f}")
-
-    # Report percentiles for normalization
-    p2, p25, p75, p98 = np.percentile(twi_valid, [2, 25, 75, 98])
-    print(f"  P2: {p2:.3f}")
-    print(f"  P25: {p25:.3f}")
-    print(f"  P75: {p75:.3f}")
-    print(f"  P98: {p98:.3f}")
-
-    # Save output
-    print(f"\nSaving TWI raster to {output_path}...")
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    profile.update({
-        'dtype': 'float32',
-        'nodata': -9999.0,
-        'compress': 'lzw',
-        'predictor': 3  # Floating point predictor
-    })
-
-    with rasterio.open(output_path, 'w', **profile) as dst:
-        dst.write(twi, 1)
-
-    print(f"TWI computation complete!")
+    print(f"Reading flow accumulation from {flow_accum_path}...")
+    print(f"Reading slope from {slope_deg_path}...")
+    gdal_env = {
+        'GDAL_CACHEMAX': os.environ.get('GDAL_CACHEMAX', GDAL_CACHEMAX_MB),
+        'GDAL_NUM_THREADS': 'ALL_CPUS'
+    }
+    with rasterio.Env(**gdal_env), \
+            rasterio.open(flow_accum_path, sharing=False) as accum_src, \
+            rasterio.open(slope_deg_path, sharing=False) as slope_src:
+        # Present both inputs on the flow accumulation grid with identical
+        # block sizes, so each output block maps onto whole cached input blocks
+        vrt_options = {
+            'crs': accum_src.crs,
+            'transform': accum_src.transform,
+            'width': accum_src.width,
+            'height': accum_src.height,
+            'resampling': Resampling.nearest,
+            'blockxsize': BLOCK_SIZE,
+            'blockysize': BLOCK_SIZE
+        }
+        with WarpedVRT(accum_src, **vrt_options) as accum_vrt, \
+                WarpedVRT(slope_src, **vrt_options) as slope_vrt:
+            profile = accum_src.profile.copy()
+            nodata_accum = accum_src.nodata
+            nodata_slope = slope_src.nodata
+
+            profile.update({
+                'dtype': 'int16',
+                'nodata': TWI_NODATA,
+                'compress': 'lzw',
+                'predictor': 2,  # Horizontal differencing predictor
+                'tiled': True,
+                'blockxsize': BLOCK_SIZE,
+                'blockysize': BLOCK_SIZE
+            })
+
+            print(f"Writing TWI raster to {output_path}...")
+            with rasterio.open(output_path, 'w', **profile) as dst:
+                dst.scales = (TWI_SCALE,)
+                dst.update_tags(scale_factor=TWI_SCALE)
+
+                # Block-sized buffers reused for every window; edge windows
+                # take a contiguous prefix of each buffer
+                n_cells = BLOCK_SIZE * BLOCK_SIZE
+                flow_buf = np.empty(n_cells, dtype=np.float32)
+                slope_buf = np.empty(n_cells, dtype=np.float32)
+                twi_buf = np.empty(n_cells, dtype=np.float32)
+                tan_log_buf = np.empty(n_cells, dtype=np.float32)
+                valid_buf = np.empty(n_cells, dtype=bool)
+                scratch_buf = np.empty(n_cells, dtype=bool)
+                out_buf = np.empty(n_cells, dtype=np.int16)
+
+                for _, window in accum_vrt.block_windows(1):
+                    shape = (window.height, window.width)
+                    size = window.height * window.width
+                    flow_accum = flow_buf[:size].reshape(shape)
+                    slope_deg = slope_buf[:size].reshape(shape)
+                    twi = twi_buf[:size].reshape(shape)
+                    tan_log = tan_log_buf[:size].reshape(shape)
+                    valid = valid_buf[:size].reshape(shape)
+                    scratch = scratch_buf[:size].reshape(shape)
+                    out = out_buf[:size].reshape(shape)
+
+                    accum_vrt.read(1, window=window, out=flow_accum)
+                    slope_vrt.read(1, window=window, out=slope_deg)
+
+                    # Valid where both inputs have data and flow accumulation is positive
+                    np.greater(flow_accum, 0, out=valid)
+                    valid &= np.isfinite(flow_accum, out=scratch)
+                    valid &= np.isfinite(slope_deg, out=scratch)
+                    if nodata_accum is not None:
+                        valid &= np.not_equal(flow_accum, nodata_accum, out=scratch)
+                    if nodata_slope is not None:
+                        valid &= np.not_equal(slope_deg, nodata_slope, out=scratch)
+
+                    # TWI = ln(flow_accum) + ln(cell_area) - ln(tan(max(slope, min_slope))),
+                    # each step written in place so every buffer sees one pass
+                    twi.fill(np.nan)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        np.log(flow_accum, where=valid, out=twi)
+                        twi += log_cell_area
+                        np.multiply(slope_deg, deg2rad_scale, out=tan_log)
+                        np.maximum(tan_log, min_rad, out=tan_log)
+                        np.tan(tan_log, out=tan_log)
+                        np.log(tan_log, out=tan_log)
+                        twi -= tan_log
+                    valid &= np.isfinite(twi, out=scratch)
+                    twi_valid = twi[valid]
+
+                    out.fill(TWI_NODATA)
+                    out[valid] = np.clip(np.round(twi_valid / TWI_SCALE), -32767, 32767)
+                    dst.write(out, 1, window=window)
+
+                    if twi_valid.size == 0:
+                        continue
+                    count += twi_valid.size
+                    total += float(np.sum(twi_valid, dtype=np.float64))
+                    total_sq += float(np.dot(twi_valid.astype(np.float64), twi_valid))
+                    twi_min = min(twi_min, float(twi_valid.min()))
+                    twi_max = max(twi_max, float(twi_valid.max()))
+                    update_histogram(hist, twi_valid, TWI_HIST_MIN, TWI_HIST_BIN)
+
+        total_pixels = accum_src.width * accum_src.height
+
+    print(f"Valid pixels: {count:,} / {total_pixels:,}")
+
+    if count == 0:
+        print("No valid TWI pixels; statistics skipped.")
+    else:
+        mean = total / count
+        std = math.sqrt(max(total_sq / count - mean * mean, 0.0))
+        median, p2, p25, p75, p98 = histogram_percentiles(
+            hist, [50, 2, 25, 75, 98], TWI_HIST_MIN, TWI_HIST_BIN
+        )
+
+        # Report statistics
+        print(f"\nTWI Statistics:")
+        print(f"  Min: {twi_min:.3f}")
+        print(f"  Max: {twi_max:.3f}")
+        print(f"  Mean: {mean:.3f}")
+        print(f"  Median: {median:.3f}")
+        print(f"  Std Dev: {std:.3f}")
+
+        # Report percentiles for normalization
+        print(f"  P2: {p2:.3f}")
+        print(f"  P25: {p25:.3f}")
+        print(f"  P75: {p75:.3f}")
+        print(f"  P98: {p98:.3f}")
+
+    print(f"\nTWI computation complete!")
     print(f"Output: {output_path}")
 
     return output_path
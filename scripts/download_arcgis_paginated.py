@@ -6,11 +6,18 @@ The ArcGIS REST API limits result size, so this script paginates through
 all features using resultOffset and resultRecordCount parameters.
 """
 
-import requests
+import asyncio
+from collections import deque
+import httpx
 import json
+import os
 from pathlib import Path
-from typing import Dict, List
-import time
+from typing import AsyncIterator, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional faster serializer
+    orjson = None
 
 # Target dataset
 DATASET = {
@@ -26,55 +33,238 @@ AOI_BBOX = (-77.5, 38.6, -76.9, 39.0)  # minx, miny, maxx, maxy
 BATCH_SIZE = 50  # Features per request (reduced from 1000 due to large geometries)
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
+MAX_CONCURRENT = 8  # Page requests in flight at once
+GEOMETRY_PRECISION = 6  # Output coordinate decimals (~0.1 m in WGS84)
+
+
+def _dumps(feature: Dict) -> str:
+    """Serialize one feature, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(feature).decode()
+    return json.dumps(feature)
+
+
+def _bbox_params(bbox: tuple) -> Dict:
+    """Build the spatial filter parameters shared by all layer queries."""
+    return {
+        "where": "1=1",  # Get all features
+        "geometry": f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]}",
+        "geometryType": "esriGeometryEnvelope",
+        "spatialRel": "esriSpatialRelIntersects",
+        "inSR": "4326",  # Input spatial reference (WGS84)
+    }
+
+
+def new_client() -> httpx.AsyncClient:
+    """Create the HTTP/2 client shared by every request for one layer."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=MAX_CONCURRENT, max_keepalive_connections=MAX_CONCURRENT),
+        timeout=120
+    )
+
+
+async def _get_json(client: httpx.AsyncClient, url: str, params: Dict, description: str) -> Dict:
+    """
+    GET a query URL and decode the JSON response, retrying on failure.
+
+    ArcGIS reports failed queries as HTTP 200 with an ``error`` body; those
+    are retried and raised like HTTP errors.
+
+    Args:
+        client: Shared HTTP client
+        url: Query URL
+        params: Query parameters
+        description: Request description used in log messages
+
+    Returns:
+        Decoded JSON response
+
+    Raises:
+        httpx.HTTPError: If the request still fails after MAX_RETRIES
+        ValueError: If the response is not JSON or is an ArcGIS error body
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            if isinstance(data, dict) and "error" in data:
+                error = data["error"] or {}
+                raise ValueError(
+                    f"ArcGIS error {error.get('code')}: {error.get('message')} {error.get('details') or ''}".rstrip()
+                )
+            return data
+
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"  {description} failed (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+            if attempt < MAX_RETRIES - 1:
+                print(f"  Retrying in {RETRY_DELAY} seconds...")
+                await asyncio.sleep(RETRY_DELAY)
+            else:
+                raise
 
 
-def query_features(url: str, offset: int, count: int, bbox: tuple) -> Dict:
+async def query_layer_edit_date(client: httpx.AsyncClient, url: str) -> Optional[int]:
+    """
+    Query when the layer's data was last edited.
+
+    Args:
+        client: Shared HTTP client
+        url: FeatureServer layer URL
+
+    Returns:
+        Last edit time in epoch milliseconds, or None if the service does
+        not track edits
+    """
+    data = await _get_json(client, url, {"f": "json"}, "Layer info query")
+    editing_info = data.get("editingInfo") or {}
+    return editing_info.get("dataLastEditDate") or editing_info.get("lastEditDate")
+
+
+def layer_edit_date(url: str) -> Optional[int]:
+    """
+    Synchronous query_layer_edit_date for downloaders outside asyncio.
+
+    Args:
+        url: FeatureServer layer URL
+
+    Returns:
+        Last edit time in epoch milliseconds, or None if the service does
+        not track edits
+    """
+    async def _query():
+        async with new_client() as client:
+            return await query_layer_edit_date(client, url)
+
+    return asyncio.run(_query())
+
+
+async def query_object_id_field(client: httpx.AsyncClient, url: str) -> str:
+    """
+    Query the name of the layer's ObjectID field.
+
+    Args:
+        client: Shared HTTP client
+        url: FeatureServer layer URL
+
+    Returns:
+        ObjectID field name (OBJECTID if the service does not report one)
+    """
+    data = await _get_json(client, url, {"f": "json"}, "Layer info query")
+    return data.get("objectIdField") or "OBJECTID"
+
+
+async def query_feature_count(client: httpx.AsyncClient, url: str, bbox: tuple) -> int:
+    """
+    Query the number of features in the bounding box.
+
+    Args:
+        client: Shared HTTP client
+        url: FeatureServer layer URL
+        bbox: Bounding box (minx, miny, maxx, maxy)
+
+    Returns:
+        Total feature count
+    """
+    params = _bbox_params(bbox)
+    params.update({"returnCountOnly": "true", "f": "json"})
+    data = await _get_json(client, f"{url}/query", params, "Count query")
+    return int(data.get("count", 0))
+
+
+async def query_features(
+    client: httpx.AsyncClient,
+    url: str,
+    offset: int,
+    count: int,
+    bbox: tuple,
+    order_by: str
+) -> Dict:
     """
     Query features from ArcGIS REST endpoint with pagination.
 
     Args:
+        client: Shared HTTP client
         url: FeatureServer layer URL
         offset: Result offset (starting position)
         count: Number of features to return
         bbox: Bounding box (minx, miny, maxx, maxy)
+        order_by: Field giving every page the same stable row order
 
     Returns:
         GeoJSON FeatureCollection dict
     """
-    params = {
-        "where": "1=1",  # Get all features
-        "outFields": "*",  # All fields
-        "geometry": f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]}",
-        "geometryType": "esriGeometryEnvelope",
-        "spatialRel": "esriSpatialRelIntersects",
-        "inSR": "4326",  # Input spatial reference (WGS84)
+    params = _bbox_params(bbox)
+    params.update({
+        "outFields": "*",
         "outSR": "4326",  # Output spatial reference (WGS84)
+        # Trim the payload: rounded coordinates, no Z/M values
+        "geometryPrecision": GEOMETRY_PRECISION,
+        "returnZ": "false",
+        "returnM": "false",
+        # Offset pages are separate queries; without an explicit order the
+        # server may return overlapping or missing rows between them
+        "orderByFields": f"{order_by} ASC",
         "resultOffset": offset,
         "resultRecordCount": count,
         "f": "geojson"
-    }
+    })
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            print(f"  Requesting offset {offset}, count {count} (attempt {attempt + 1}/{MAX_RETRIES})...", end=" ", flush=True)
-            response = requests.get(f"{url}/query", params=params, timeout=120)
-            response.raise_for_status()
+    data = await _get_json(client, f"{url}/query", params, f"Offset {offset}")
+    print(f"  Offset {offset}: received {len(data.get('features', []))} features")
+    return data
 
-            data = response.json()
-            feature_count = len(data.get("features", []))
-            print(f"received {feature_count} features")
 
-            return data
+async def iter_feature_pages(
+    client: httpx.AsyncClient,
+    url: str,
+    bbox: tuple,
+    batch_size: int,
+    expected: int
+) -> AsyncIterator[List[Dict]]:
+    """
+    Fetch every page of a layer concurrently and yield features in page order.
 
-        except (requests.RequestException, json.JSONDecodeError) as e:
-            print(f"failed: {e}")
-            if attempt < MAX_RETRIES - 1:
-                print(f"  Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY)
-            else:
-                raise
+    The pages are independent once the total is known, so up to
+    MAX_CONCURRENT of them are requested ahead of the consumer. The next
+    offset is scheduled only after the oldest page has been yielded, so at
+    most MAX_CONCURRENT pages are ever held in memory.
 
-    return {"type": "FeatureCollection", "features": []}
+    Args:
+        client: Shared HTTP client
+        url: FeatureServer layer URL
+        bbox: Bounding box (minx, miny, maxx, maxy)
+        batch_size: Features per page
+        expected: Total feature count from query_feature_count
+
+    Yields:
+        List of GeoJSON features for each page
+    """
+    if expected <= 0:
+        return
+    order_by = await query_object_id_field(client, url)
+    offsets = iter(range(0, expected, batch_size))
+    pending = deque()
+
+    def schedule_next():
+        offset = next(offsets, None)
+        if offset is not None:
+            pending.append(asyncio.create_task(query_features(
+                client, url, offset, batch_size, bbox, order_by
+            )))
+
+    for _ in range(MAX_CONCURRENT):
+        schedule_next()
+    try:
+        # Await in offset order so features keep the server's ordering
+        while pending:
+            batch = await pending.popleft()
+            yield batch.get("features", [])
+            schedule_next()
+    finally:
+        for task in pending:
+            task.cancel()
 
 
 def download_layer(name: str, url: str, output_dir: Path, bbox: tuple, batch_size: int = BATCH_SIZE):
@@ -88,6 +278,10 @@ def download_layer(name: str, url: str, output_dir: Path, bbox: tuple, batch_siz
         bbox: Bounding box
         batch_size: Features per batch
     """
+    return asyncio.run(_download_layer(name, url, output_dir, bbox, batch_size))
+
+
+async def _download_layer(name: str, url: str, output_dir: Path, bbox: tuple, batch_size: int):
     output_file = output_dir / f"{name}.geojson"
     output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -97,46 +291,67 @@ def download_layer(name: str, url: str, output_dir: Path, bbox: tuple, batch_siz
     print(f"Source: {url}")
     print(f"Output: {output_file}")
     print(f"Batch size: {batch_size}")
+    print(f"Concurrent requests: {MAX_CONCURRENT}")
 
-    # Initialize combined GeoJSON
-    combined = {
-        "type": "FeatureCollection",
-        "features": []
-    }
-
-    # Paginate through all features
-    offset = 0
-    total_features = 0
+    async with new_client() as client:
+        total_features = await _fetch_to_file(client, url, bbox, batch_size, output_file)
 
-    while True:
-        batch = query_features(url, offset, batch_size, bbox)
-        features = batch.get("features", [])
+    # Verify output
+    size_mb = output_file.stat().st_size / (1024 * 1024)
+    print(f"Download complete: {output_file.name} ({size_mb:.1f} MB, {total_features} features)")
 
-        if not features:
-            print(f"  No more features at offset {offset}")
-            break
+    return output_file
 
-        combined["features"].extend(features)
-        total_features += len(features)
-        offset += batch_size
 
-        print(f"  Total features collected: {total_features}")
+async def _fetch_to_file(
+    client: httpx.AsyncClient, url: str, bbox: tuple, batch_size: int, output_file: Path
+) -> int:
+    """
+    Fetch every page concurrently and stream the features to a GeoJSON file.
 
-        # Check if we got fewer features than requested (last page)
-        if len(features) < batch_size:
-            print(f"  Last page reached ({len(features)} < {batch_size})")
-            break
+    Args:
+        client: Shared HTTP client
+        url: FeatureServer layer URL
+        bbox: Bounding box
+        batch_size: Features per batch
+        output_file: GeoJSON output path
 
-    # Write combined GeoJSON
-    print(f"\nWriting {total_features} features to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(combined, f)
+    Returns:
+        Number of features written
 
-    # Verify output
-    size_mb = output_file.stat().st_size / (1024 * 1024)
-    print(f"Download complete: {output_file.name} ({size_mb:.1f} MB, {total_features} features)")
+    Raises:
+        ValueError: If fewer or more features arrive than the layer reports
+    """
+    expected = await query_feature_count(client, url, bbox)
+    print(f"Features in AOI: {expected}")
+
+    # Stream features into the FeatureCollection as each page arrives, so only
+    # the in-flight pages are ever held in memory. Pages go to a temporary
+    # file that replaces the output only once complete, so a failed download
+    # leaves the previous file intact
+    print(f"Writing features to {output_file}...")
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    total_features = 0
+    try:
+        with open(tmp_file, 'w') as f:
+            f.write('{"type": "FeatureCollection", "features": [\n')
+            async for features in iter_feature_pages(client, url, bbox, batch_size, expected):
+                for feature in features:
+                    if total_features:
+                        f.write(',\n')
+                    f.write(_dumps(feature))
+                    total_features += 1
+            f.write('\n]}\n')
 
-    return output_file
+        print(f"  Total features collected: {total_features}")
+        # A short download is a failure; keep the previous file instead
+        if total_features != expected:
+            raise ValueError(f"expected {expected} features, received {total_features}")
+        os.replace(tmp_file, output_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+    return total_features
 
 
 def main():
@@ -3,17 +3,29 @@
 Download Fairfax County hydrography datasets via ArcGIS REST API.
 
 Downloads Water Features (lines and polygons), Perennial Streams, and
-Watersheds from Fairfax County Open Data. Reprojects from State Plane
-feet to WGS84 and clips to AOI bounding box.
+Watersheds from Fairfax County Open Data. Pages are fetched concurrently
+in WGS84, clipped to the AOI bounding box, and written with pyogrio.
+Layers whose service data has not been edited since the last download are
+skipped; delete the .gpkg.cachekey sidecar to force a refresh.
 
 Usage:
     python download_fairfax_hydro.py
 """
 
-import subprocess
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional, Tuple
 import sys
 
+import geopandas as gpd
+import httpx
+
+# Add path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+from download_arcgis_paginated import new_client, query_layer_edit_date, query_feature_count, iter_feature_pages
+from lib.cache import cache_key, is_cached, write_cache_key, clear_cache_key
+
 # Paths
 DATA_DIR = Path(__file__).parent.parent / "data" / "raw" / "fairfax"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -46,10 +58,16 @@ DATASETS = {
     }
 }
 
+# Layers downloaded at once; kept small to stay under ArcGIS rate limits
+MAX_PARALLEL_DOWNLOADS = 4
+
+# Features per page request; must not exceed the services' maxRecordCount
+PAGE_SIZE = 1000
+
 
 def download_layer(name: str, config: dict):
     """
-    Download a single layer using ogr2ogr.
+    Download a single layer with concurrent paged ArcGIS queries.
 
     Args:
         name: Dataset name (used for output filename)
@@ -63,50 +81,72 @@ def download_layer(name: str, config: dict):
     print(f"Source: {config['url']}")
     print(f"Output: {output_file}")
 
-    # Build ogr2ogr command
-    cmd = [
-        "ogr2ogr",
-        "-f", "GPKG",
-        str(output_file),
-        config["url"],
-        "-t_srs", "EPSG:4326",  # Target: WGS84
-        "-spat", str(AOI_BBOX[0]), str(AOI_BBOX[1]), str(AOI_BBOX[2]), str(AOI_BBOX[3]),
-        "-spat_srs", "EPSG:4326",  # Spatial filter in WGS84
-        "-progress",
-        "-overwrite"
-    ]
-
-    # Add field selection if specified
-    if config.get("fields"):
-        # Note: ArcGIS REST doesn't support -select, will use all fields
-        # Field filtering will happen in processing script
-        pass
-
-    # Execute download
     try:
-        print(f"\nExecuting: {' '.join(cmd)}")
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        # All attributes are requested; the processing script maps them to
+        # the normalized schema and tolerates missing columns
+        features, key = asyncio.run(_fetch_features(config["url"], output_file))
+        if features is None:
+            print(f"\n✓ Up to date, skipping: {output_file.name}")
+            return True
+
+        if features:
+            # Pages arrive in WGS84; keep features intersecting the AOI
+            gdf = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+            minx, miny, maxx, maxy = AOI_BBOX
+            gdf = gdf.cx[minx:maxx, miny:maxy]
+        else:
+            # No features in the AOI (a short download raises above); write
+            # an empty layer as the ogr2ogr -spat download did
+            gdf = gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
 
-        # Show progress
-        if result.stdout:
-            print(result.stdout)
+        clear_cache_key(output_file)
+        gdf.to_file(output_file, driver="GPKG", engine="pyogrio")
 
         # Verify output
         if output_file.exists():
             size_mb = output_file.stat().st_size / (1024 * 1024)
-            print(f"\n✓ Download successful: {output_file.name} ({size_mb:.1f} MB)")
+            print(f"\n✓ Download successful: {output_file.name} ({size_mb:.1f} MB, {len(gdf):,} features)")
+            if key:
+                write_cache_key(output_file, key)
         else:
             print(f"\n✗ Download failed: {output_file.name} not created")
             return False
 
-    except subprocess.CalledProcessError as e:
+    except (httpx.HTTPError, ValueError) as e:
         print(f"\n✗ Error downloading {name}:")
-        print(e.stderr)
+        print(e)
         return False
 
     return True
 
 
+async def _fetch_features(url: str, output_file: Path) -> Tuple[Optional[list], Optional[str]]:
+    """
+    Fetch all AOI features of a layer as GeoJSON feature dicts.
+
+    Returns (None, key) without downloading when output_file was built from
+    the layer's current data. The key is None if the service does not
+    report edit dates, in which case the layer is always downloaded.
+    Raises ValueError if the pages do not add up to the reported count.
+    """
+    async with new_client() as client:
+        edit_date = await query_layer_edit_date(client, url)
+        key = cache_key(url, AOI_BBOX, edit_date) if edit_date else None
+        if key and is_cached(output_file, key):
+            return None, key
+
+        expected = await query_feature_count(client, url, AOI_BBOX)
+        print(f"  {url}: {expected} features in AOI")
+        features = []
+        async for page in iter_feature_pages(client, url, AOI_BBOX, PAGE_SIZE, expected):
+            features.extend(page)
+        # Never cache a partial layer: a short download fails the layer so
+        # the next run retries it
+        if len(features) != expected:
+            raise ValueError(f"expected {expected} features, received {len(features)}")
+        return features, key
+
+
 def verify_downloads():
     """Verify all downloads completed successfully."""
     print(f"\n{'='*70}")
@@ -136,11 +176,17 @@ def main():
     print(f"Datasets: {len(DATASETS)}")
     print(f"{'='*70}")
 
-    # Download each dataset
+    # Download datasets concurrently; each layer is network-bound
     success_count = 0
-    for name, config in DATASETS.items():
-        if download_layer(name, config):
-            success_count += 1
+    max_workers = min(MAX_PARALLEL_DOWNLOADS, len(DATASETS))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(download_layer, name, config): name
+            for name, config in DATASETS.items()
+        }
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
 
     # Verify
     print(f"\n{'='*70}")
@@ -4,15 +4,27 @@ Download Fairfax County stormwater and flood risk datasets via ArcGIS REST API.
 
 Downloads Floodplain Easements, Inadequate Outfalls, and Outfall Pour Points
 from Fairfax County Open Data. Reprojects to WGS84 and clips to AOI bounding box.
+Layers whose service data has not been edited since the last download are
+skipped; delete the .gpkg.cachekey sidecar to force a refresh.
 
 Usage:
     python download_fairfax_stormwater.py
 """
 
+import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from urllib.parse import urlencode
 import sys
 
+import httpx
+
+# Add path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+from download_arcgis_paginated import layer_edit_date
+from lib.cache import cache_key, is_cached, write_cache_key, clear_cache_key
+
 # Paths
 DATA_DIR = Path(__file__).parent.parent / "data" / "raw" / "fairfax"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -41,6 +53,47 @@ DATASETS = {
 }
 
 
+# Layers downloaded at once; kept small to stay under ArcGIS rate limits
+MAX_PARALLEL_DOWNLOADS = 3
+
+# GDAL/libcurl settings for the ogr2ogr runs: HTTP/2 with keep-alive so
+# ESRIJSON paging reuses one TLS connection, fail fast on dead connects and
+# retry transient errors instead of aborting the layer
+GDAL_HTTP_CONFIG = {
+    "GDAL_HTTP_VERSION": "2TLS",
+    "GDAL_HTTP_TCP_KEEPALIVE": "YES",
+    "GDAL_HTTP_CONNECTTIMEOUT": "10",
+    "GDAL_HTTP_MAX_RETRY": "3",
+    "GDAL_HTTP_RETRY_DELAY": "1",
+}
+
+
+def query_url(layer_url: str) -> str:
+    """
+    Build an ArcGIS /query URL that filters to the AOI on the server.
+
+    GDAL does not reliably push -spat into ArcGIS requests, so the envelope
+    goes into the query itself and the server also reprojects to WGS84.
+
+    Args:
+        layer_url: FeatureServer layer URL (ending in the layer id)
+
+    Returns:
+        str: Fully-qualified query URL readable by GDAL's ESRIJSON driver
+    """
+    params = {
+        "where": "1=1",
+        "geometry": ",".join(str(v) for v in AOI_BBOX),
+        "geometryType": "esriGeometryEnvelope",
+        "spatialRel": "esriSpatialRelIntersects",
+        "inSR": "4326",
+        "outSR": "4326",
+        "outFields": "*",
+        "f": "json",
+    }
+    return f"{layer_url.rstrip('/')}/query?{urlencode(params)}"
+
+
 def download_layer(name: str, config: dict):
     """
     Download a single layer using ogr2ogr.
@@ -60,15 +113,28 @@ def download_layer(name: str, config: dict):
     print(f"Source: {config['url']}")
     print(f"Output: {output_file}")
 
-    # Build ogr2ogr command
+    # Skip the download when the service data is unchanged since last time
+    url = query_url(config["url"])
+    try:
+        edit_date = layer_edit_date(config["url"])
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"\nError querying {name} layer info:")
+        print(e)
+        return False
+    key = cache_key(url, edit_date) if edit_date else None
+    if key and is_cached(output_file, key):
+        print(f"\nUp to date, skipping: {output_file.name}")
+        return True
+    clear_cache_key(output_file)
+
+    # Build ogr2ogr command; the query URL filters and reprojects server-side
     cmd = [
         "ogr2ogr",
         "-f", "GPKG",
         str(output_file),
-        config["url"],
-        "-t_srs", "EPSG:4326",  # Target: WGS84
+        url,
         "-spat", str(AOI_BBOX[0]), str(AOI_BBOX[1]), str(AOI_BBOX[2]), str(AOI_BBOX[3]),
-        "-spat_srs", "EPSG:4326",  # Spatial filter in WGS84
+        "-spat_srs", "EPSG:4326",  # Safety net if the server ignores the envelope
         "-progress",
         "-overwrite"
     ]
@@ -82,7 +148,13 @@ def download_layer(name: str, config: dict):
     # Execute download
     try:
         print(f"\nExecuting: {' '.join(cmd)}")
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        result = subprocess.run(
+            cmd,
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, **GDAL_HTTP_CONFIG}
+        )
 
         # Show progress
         if result.stdout:
@@ -92,6 +164,8 @@ def download_layer(name: str, config: dict):
         if output_file.exists():
             size_mb = output_file.stat().st_size / (1024 * 1024)
             print(f"\nDownload successful: {output_file.name} ({size_mb:.1f} MB)")
+            if key:
+                write_cache_key(output_file, key)
         else:
             print(f"\nDownload failed: {output_file.name} not created")
             return False
@@ -133,11 +207,17 @@ def main():
     print(f"Datasets: {len(DATASETS)}")
     print(f"{'='*70}")
 
-    # Download each dataset
+    # Download datasets concurrently; each ogr2ogr run is network-bound
     success_count = 0
-    for name, config in DATASETS.items():
-        if download_layer(name, config):
-            success_count += 1
+    max_workers = min(MAX_PARALLEL_DOWNLOADS, len(DATASETS))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(download_layer, name, config): name
+            for name, config in DATASETS.items()
+        }
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
 
     # Verify
     print(f"\n{'='*70}")
@@ -20,8 +20,27 @@ from pathlib import Path
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+import pyogrio
+import shapely
 from tqdm import tqdm
 
+try:
+    import pyarrow  # noqa: F401  (enables pyogrio's Arrow read path)
+    USE_ARROW = True
+except ImportError:
+    USE_ARROW = False
+
+try:
+    import numba
+except ImportError:  # Optional JIT for the scoring kernel
+    numba = None
+
+# Number of progress-bar steps when sampling the flow accumulation raster
+SAMPLE_CHUNKS = 64
+
+# stream_type categories, indexed by classification code
+FLOW_PERSISTENCE_CLASSES = ['Ephemeral', 'Intermittent', 'Perennial']
+
 
 @click.command()
 @click.option(
@@ -71,29 +90,36 @@ def main(input, output, layer, min_length, min_drainage_area, flow_acc):
     click.echo(f"  Min length: {min_length} m")
     click.echo(f"  Min drainage area: {min_drainage_area} km²")
 
-    # Read input streams
+    # Read input streams. Step 1 (minimum length) is pushed into GDAL as an
+    # attribute filter so discarded segments are never decoded.
     try:
-        streams_gdf = gpd.read_file(input_path, layer=layer)
+        original_count = pyogrio.read_info(input_path, layer=layer, force_feature_count=True)['features']
+        streams_gdf = gpd.read_file(
+            input_path,
+            layer=layer,
+            engine='pyogrio',
+            use_arrow=USE_ARROW,
+            where=f'"length_m" >= {float(min_length)!r}'
+        )
     except Exception as e:
         click.echo(f"Error reading layer '{layer}': {e}")
         click.echo(f"Available layers:")
-        import fiona
-        with fiona.open(input_path) as src:
-            for layer_name in fiona.listlayers(input_path):
-                click.echo(f"  - {layer_name}")
+        for layer_name, _ in pyogrio.list_layers(input_path):
+            click.echo(f"  - {layer_name}")
         return 1
 
-    click.echo(f"  Input features: {len(streams_gdf)}")
+    click.echo(f"  Input features: {original_count}")
 
-    original_count = len(streams_gdf)
+    # Each stage only narrows a boolean keep-mask; the frame is subset once,
+    # after the last filter, instead of being copied after every stage
 
-    # Step 1: Filter by minimum length
+    # Step 1: Filter by minimum length (applied while reading)
     click.echo("\nStep 1: Filtering by minimum length...")
-    streams_gdf = streams_gdf[streams_gdf['length_m'] >= min_length].copy()
+    keep = np.ones(len(streams_gdf), dtype=bool)
     removed = original_count - len(streams_gdf)
     click.echo(f"  Removed {removed} segments < {min_length}m ({removed/original_count*100:.1f}%)")
 
-    if len(streams_gdf) == 0:
+    if not keep.any():
         click.echo("Error: No streams remaining after length filter!")
         return 1
 
@@ -104,14 +130,14 @@ def main(input, output, layer, min_length, min_drainage_area, flow_acc):
 
         # Filter by minimum drainage area if column exists
         if 'drainage_area_sqkm' in streams_gdf.columns:
-            before_filter = len(streams_gdf)
-            streams_gdf = streams_gdf[streams_gdf['drainage_area_sqkm'] >= min_drainage_area].copy()
-            removed = before_filter - len(streams_gdf)
+            before_filter = keep.sum()
+            keep &= (streams_gdf['drainage_area_sqkm'] >= min_drainage_area).to_numpy()
+            removed = before_filter - keep.sum()
             click.echo(f"  Removed {removed} segments < {min_drainage_area} km² drainage area ({removed/before_filter*100:.1f}%)")
     elif min_drainage_area > 0:
         click.echo("\nStep 2: Skipping drainage area filter (no flow_acc raster provided)")
 
-    if len(streams_gdf) == 0:
+    if not keep.any():
         click.echo("Error: No streams remaining after drainage area filter!")
         return 1
 
@@ -121,15 +147,20 @@ def main(input, output, layer, min_length, min_drainage_area, flow_acc):
 
     # Step 4: Filter likely artifacts based on geometry
     click.echo("\nStep 4: Filtering geometric artifacts...")
-    before_geom_filter = len(streams_gdf)
-    streams_gdf = filter_geometric_artifacts(streams_gdf)
-    removed_geom = before_geom_filter - len(streams_gdf)
+    before_geom_filter = keep.sum()
+    suspicious = keep & geometric_artifact_mask(streams_gdf)
+    removed_geom = suspicious.sum()
+    if removed_geom > 0:
+        click.echo(f"    Flagged {removed_geom} suspicious straight segments")
+    keep &= ~suspicious
     click.echo(f"  Removed {removed_geom} geometric artifacts ({removed_geom/before_geom_filter*100:.1f}%)")
 
-    if len(streams_gdf) == 0:
+    if not keep.any():
         click.echo("Error: No streams remaining after geometric filter!")
         return 1
 
+    streams_gdf = streams_gdf.take(np.flatnonzero(keep))
+
     # Step 5: Compute confidence scores
     click.echo("\nStep 5: Computing confidence scores...")
     streams_gdf = compute_confidence_scores(streams_gdf)
@@ -144,7 +175,7 @@ def main(input, output, layer, min_length, min_drainage_area, flow_acc):
     # Save filtered streams
     click.echo(f"\nSaving filtered streams to {output_path}...")
     output_layer = layer + '_filtered'
-    streams_gdf.to_file(output_path, driver='GPKG', layer=output_layer)
+    streams_gdf.to_file(output_path, driver='GPKG', layer=output_layer, engine='pyogrio', use_arrow=USE_ARROW)
 
     # Print summary statistics
     click.echo("\n" + "="*60)
@@ -196,72 +227,59 @@ def calculate_geometric_metrics(streams_gdf):
     DEM artifacts tend to be very straight (sinuosity ~1.0),
     while real streams meander (sinuosity typically 1.2-3.0).
     """
-    from shapely.geometry import Point
-
-    sinuosities = []
-
-    for idx, row in streams_gdf.iterrows():
-        geom = row.geometry
+    geoms = np.asarray(streams_gdf.geometry.values)
+    sinuosities = np.ones(len(geoms))
+
+    # Reduce every line geometry to a single LineString: itself, or the
+    # longest part of a MultiLineString (first one wins on ties)
+    is_line = np.isin(
+        shapely.get_type_id(geoms),
+        [shapely.GeometryType.LINESTRING, shapely.GeometryType.MULTILINESTRING]
+    )
+    parts, part_idx = shapely.get_parts(geoms[is_line], return_index=True)
+    part_lengths = shapely.length(parts)
+    order = np.lexsort((-part_lengths, part_idx))
+    owners, first = np.unique(part_idx[order], return_index=True)
+    longest = parts[order[first]]
+    lengths = part_lengths[order[first]]
+
+    # Straight-line distance between the first and last vertex
+    straight_distance = shapely.distance(
+        shapely.get_point(longest, 0),
+        shapely.get_point(longest, -1)
+    )
 
-        if geom.geom_type == 'LineString':
-            # Calculate straight-line distance
-            start_point = Point(geom.coords[0])
-            end_point = Point(geom.coords[-1])
-            straight_distance = start_point.distance(end_point)
+    # Sinuosity = actual length / straight distance; zero-length or loops
+    # are marked as suspicious (1.0)
+    closed = ~(straight_distance > 0)
+    line_sinuosity = lengths / np.where(closed, np.inf, straight_distance)
+    line_sinuosity[closed] = 1.0
 
-            # Sinuosity = actual length / straight distance
-            if straight_distance > 0:
-                # Use projected length for accuracy
-                sinuosity = geom.length / straight_distance
-            else:
-                # Zero-length or loop - mark as suspicious
-                sinuosity = 1.0
-        elif geom.geom_type == 'MultiLineString':
-            # For MultiLineString, calculate for the longest segment
-            longest_line = max(geom.geoms, key=lambda l: l.length)
-            start_point = Point(longest_line.coords[0])
-            end_point = Point(longest_line.coords[-1])
-            straight_distance = start_point.distance(end_point)
-
-            if straight_distance > 0:
-                sinuosity = longest_line.length / straight_distance
-            else:
-                sinuosity = 1.0
-        else:
-            sinuosity = 1.0
-
-        sinuosities.append(sinuosity)
+    sinuosities[np.flatnonzero(is_line)[owners]] = line_sinuosity
 
     streams_gdf['sinuosity'] = sinuosities
 
     return streams_gdf
 
 
-def filter_geometric_artifacts(streams_gdf):
+def geometric_artifact_mask(streams_gdf):
     """
-    Filter likely DEM artifacts based on geometric properties.
+    Flag likely DEM artifacts based on geometric properties.
 
-    Removes streams that are:
+    Flags streams that are:
     - Too straight (sinuosity < 1.05) AND short (< 100m)
       Real short streams can be straight, but DEM artifacts often are
 
     Conservative filtering to avoid removing real streams.
+
+    Returns:
+        Boolean array, True for suspicious streams
     """
-    # Identify suspicious streams
-    suspicious_mask = (
-        (streams_gdf['sinuosity'] < 1.05) &  # Very straight
-        (streams_gdf['length_m'] < 100)       # Short
+    return (
+        (streams_gdf['sinuosity'].to_numpy() < 1.05) &  # Very straight
+        (streams_gdf['length_m'].to_numpy() < 100)       # Short
     )
 
-    removed_count = suspicious_mask.sum()
-
-    if removed_count > 0:
-        click.echo(f"    Flagged {removed_count} suspicious straight segments")
-        # Remove suspicious streams
-        streams_gdf = streams_gdf[~suspicious_mask].copy()
-
-    return streams_gdf
-
 
 def calculate_drainage_areas(streams_gdf, flow_acc_path):
     """
@@ -271,7 +289,8 @@ def calculate_drainage_areas(streams_gdf, flow_acc_path):
     and converts to drainage area in km².
     """
     import rasterio
-    from rasterio.transform import rowcol
+    from rasterio.transform import rowcol, xy
+    from pyproj import Transformer
 
     with rasterio.open(flow_acc_path) as src:
         # Get pixel area in km²
@@ -294,45 +313,57 @@ def calculate_drainage_areas(streams_gdf, flow_acc_path):
             pixel_height_m = abs(src.transform[4])
             pixel_area_km2 = (pixel_width_m * pixel_height_m) / 1e6
 
-        drainage_areas = []
-
-        for idx, row in tqdm(streams_gdf.iterrows(), total=len(streams_gdf), desc="  Sampling drainage areas"):
-            # Get downstream point (last coordinate)
-            geom = row.geometry
-            if geom.geom_type == 'LineString':
-                downstream_point = geom.coords[-1]
-            elif geom.geom_type == 'MultiLineString':
-                # Get last coordinate of last linestring
-                downstream_point = list(geom.geoms[-1].coords)[-1]
-            else:
-                drainage_areas.append(np.nan)
-                continue
-
-            # Transform to raster CRS if needed
-            if streams_gdf.crs != src.crs:
-                from shapely.geometry import Point
-                point_gdf = gpd.GeoDataFrame([1], geometry=[Point(downstream_point)], crs=streams_gdf.crs)
-                point_proj = point_gdf.to_crs(src.crs).geometry.values[0]
-                x, y = point_proj.x, point_proj.y
-            else:
-                x, y = downstream_point
-
-            # Sample raster
-            r, c = rowcol(src.transform, x, y)
-
-            if 0 <= r < src.height and 0 <= c < src.width:
-                flow_accum_value = src.read(1, window=((r, r+1), (c, c+1)))[0, 0]
-
-                # Handle nodata
-                if src.nodata is not None and flow_accum_value == src.nodata:
-                    drainage_area_km2 = np.nan
-                else:
-                    # Convert flow accumulation (number of cells) to drainage area
-                    drainage_area_km2 = flow_accum_value * pixel_area_km2
-            else:
-                drainage_area_km2 = np.nan
-
-            drainage_areas.append(drainage_area_km2)
+        # Downstream point of each segment: last coordinate of the (last)
+        # line, read straight from GEOS; NaN for anything that is not a line
+        geoms = np.asarray(streams_gdf.geometry.values)
+        is_line = np.isin(
+            shapely.get_type_id(geoms),
+            [shapely.GeometryType.LINESTRING, shapely.GeometryType.MULTILINESTRING]
+        )
+        coords, owner = shapely.get_coordinates(geoms[is_line], return_index=True)
+        last = np.ones(len(owner), dtype=bool)
+        last[:-1] = owner[1:] != owner[:-1]
+        xs = np.full(len(geoms), np.nan)
+        ys = np.full(len(geoms), np.nan)
+        downstream = np.flatnonzero(is_line)[owner[last]]
+        xs[downstream] = coords[last, 0]
+        ys[downstream] = coords[last, 1]
+
+        # Transform to raster CRS if needed: one Transformer applied to the
+        # coordinate arrays, without building Point geometries
+        if streams_gdf.crs != src.crs:
+            transformer = Transformer.from_crs(streams_gdf.crs, src.crs.to_wkt(), always_xy=True)
+            xs, ys = transformer.transform(xs, ys)
+
+        drainage_areas = np.full(len(streams_gdf), np.nan)
+
+        finite = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+        rows, cols = rowcol(src.transform, xs[finite], ys[finite])
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        inside = (rows >= 0) & (rows < src.height) & (cols >= 0) & (cols < src.width)
+        targets, rows, cols = finite[inside], rows[inside], cols[inside]
+
+        # Sample pixel centers in block order so each GeoTIFF block is
+        # decoded once and then served from GDAL's cache
+        block_height, block_width = src.block_shapes[0]
+        order = np.lexsort((cols // block_width, rows // block_height))
+        targets, rows, cols = targets[order], rows[order], cols[order]
+        sample_xs, sample_ys = np.asarray(xy(src.transform, rows, cols))
+
+        # Progress is reported per chunk rather than per feature
+        flow_accum = np.empty(len(targets), dtype=np.float64)
+        chunks = np.array_split(np.arange(len(targets)), min(SAMPLE_CHUNKS, max(len(targets), 1)))
+        for chunk in tqdm(chunks, desc="  Sampling drainage areas", unit="chunk"):
+            flow_accum[chunk] = np.fromiter(
+                (v[0] for v in src.sample(zip(sample_xs[chunk], sample_ys[chunk]), indexes=1)),
+                dtype=np.float64,
+                count=len(chunk)
+            )
+
+        # Convert flow accumulation (number of cells) to drainage area
+        if src.nodata is not None:
+            flow_accum[flow_accum == src.nodata] = np.nan
+        drainage_areas[targets] = flow_accum * pixel_area_km2
 
         streams_gdf['drainage_area_sqkm'] = drainage_areas
 
@@ -350,25 +381,15 @@ def classify_flow_persistence(streams_gdf):
 
     If drainage_area is not available, defaults to Ephemeral.
     """
-    stream_types = []
-
-    for idx, row in streams_gdf.iterrows():
-        if 'drainage_area_sqkm' in streams_gdf.columns and pd.notna(row.get('drainage_area_sqkm')):
-            da = row['drainage_area_sqkm']
-
-            if da >= 5.0:
-                stream_type = 'Perennial'
-            elif da >= 0.5:
-                stream_type = 'Intermittent'
-            else:
-                stream_type = 'Ephemeral'
-        else:
-            # Default to Ephemeral if no drainage area data
-            stream_type = 'Ephemeral'
-
-        stream_types.append(stream_type)
-
-    streams_gdf['stream_type'] = stream_types
+    if 'drainage_area_sqkm' in streams_gdf.columns:
+        da = streams_gdf['drainage_area_sqkm'].to_numpy(dtype=float)
+        # NaN fails every comparison and falls through to Ephemeral (code 0)
+        codes = np.select([da >= 5.0, da >= 0.5], [2, 1], default=0).astype(np.int8)
+    else:
+        # Default to Ephemeral if no drainage area data
+        codes = np.zeros(len(streams_gdf), dtype=np.int8)
+    # Categorical keeps one int8 code per stream instead of a string object
+    streams_gdf['stream_type'] = pd.Categorical.from_codes(codes, categories=FLOW_PERSISTENCE_CLASSES)
 
     # Report distribution
     type_counts = streams_gdf['stream_type'].value_counts()
@@ -393,61 +414,107 @@ def compute_confidence_scores(streams_gdf):
 
     Score ranges from 0 to 1.
     """
-    scores = []
-
-    for idx, row in streams_gdf.iterrows():
-        # Component 1: Length score (0-1)
-        # Normalize length: 25m = 0, 500m = 1
-        length_score = min(1.0, max(0.0, (row['length_m'] - 25) / (500 - 25)))
-
-        # Component 2: Order score (0-1)
-        # Order 1 = 0.3, Order 2 = 0.6, Order 3+ = 1.0
-        order = row.get('order', 1)
-        if order == 1:
-            order_score = 0.3
-        elif order == 2:
-            order_score = 0.6
-        else:
-            order_score = 1.0
-
-        # Component 3: Drainage area score (0-1) if available
-        if 'drainage_area_sqkm' in streams_gdf.columns and pd.notna(row.get('drainage_area_sqkm')):
-            da = row['drainage_area_sqkm']
-            # Normalize: 0.1 km² = 0, 5 km² = 1
-            da_score = min(1.0, max(0.0, (da - 0.1) / (5.0 - 0.1)))
-        else:
-            da_score = 0.5  # Neutral if not available
-
-        # Component 4: Sinuosity score (0-1) if available
-        # Real streams typically have sinuosity 1.2-2.0
-        # Artifacts tend to be very straight (sinuosity ~1.0)
-        if 'sinuosity' in streams_gdf.columns and pd.notna(row.get('sinuosity')):
-            sinuosity = row['sinuosity']
-            if sinuosity < 1.1:
-                sinuosity_score = 0.2  # Very straight, suspicious
-            elif sinuosity < 1.3:
-                sinuosity_score = 0.6  # Moderately straight
-            elif sinuosity < 2.0:
-                sinuosity_score = 1.0  # Good meandering
-            else:
-                sinuosity_score = 0.8  # Very sinuous, could be artifact
-        else:
-            sinuosity_score = 0.5  # Neutral if not available
-
-        # Combined score (weighted average)
-        confidence_score = (
-            0.2 * length_score +
-            0.2 * order_score +
-            0.4 * da_score +
-            0.2 * sinuosity_score
-        )
-
-        scores.append(confidence_score)
+    n = len(streams_gdf)
+    missing = np.full(n, np.nan)
+
+    length = streams_gdf['length_m'].to_numpy(dtype=np.float64)
+    if 'order' in streams_gdf.columns:
+        order = streams_gdf['order'].to_numpy(dtype=np.float64)
+    else:
+        order = np.ones(n)
+    if 'drainage_area_sqkm' in streams_gdf.columns:
+        da = streams_gdf['drainage_area_sqkm'].to_numpy(dtype=np.float64)
+    else:
+        da = missing
+    if 'sinuosity' in streams_gdf.columns:
+        sinuosity = streams_gdf['sinuosity'].to_numpy(dtype=np.float64)
+    else:
+        sinuosity = missing
+
+    if numba is not None:
+        # Fused single pass, no intermediate component arrays
+        scores = np.empty(n)
+        _confidence_scores_jit(length, order, da, sinuosity, scores)
+    else:
+        scores = _confidence_scores_numpy(length, order, da, sinuosity)
 
     streams_gdf['confidence_score'] = scores
 
     return streams_gdf
 
 
+def _confidence_scores_numpy(length, order, da, sinuosity):
+    """Weighted confidence score from per-stream arrays (NaN = not available)."""
+    # Component 1: Length score (0-1)
+    # Normalize length: 25m = 0, 500m = 1
+    length_score = np.clip((length - 25) / (500 - 25), 0.0, 1.0)
+
+    # Component 2: Order score (0-1)
+    # Order 1 = 0.3, Order 2 = 0.6, Order 3+ = 1.0
+    order_score = np.where(order == 1, 0.3, np.where(order == 2, 0.6, 1.0))
+
+    # Component 3: Drainage area score (0-1) if available
+    # Normalize: 0.1 km² = 0, 5 km² = 1; neutral (0.5) if not available
+    da_score = np.where(np.isnan(da), 0.5, np.clip((da - 0.1) / (5.0 - 0.1), 0.0, 1.0))
+
+    # Component 4: Sinuosity score (0-1) if available
+    # Real streams typically have sinuosity 1.2-2.0
+    # Artifacts tend to be very straight (sinuosity ~1.0)
+    sinuosity_score = np.select(
+        [np.isnan(sinuosity), sinuosity < 1.1, sinuosity < 1.3, sinuosity < 2.0],
+        [0.5, 0.2, 0.6, 1.0],   # neutral, very straight, moderate, meandering
+        default=0.8             # very sinuous, could be artifact
+    )
+
+    # Combined score (weighted average)
+    return (
+        0.2 * length_score +
+        0.2 * order_score +
+        0.4 * da_score +
+        0.2 * sinuosity_score
+    )
+
+
+if numba is not None:
+    # Only FMA contraction is enabled: full fastmath assumes no NaNs and
+    # would drop the "not available" checks below
+    @numba.njit(parallel=True, fastmath={'contract'}, cache=True)
+    def _confidence_scores_jit(length, order, da, sinuosity, out):
+        """Same scoring as _confidence_scores_numpy, fused into one loop."""
+        for i in numba.prange(length.shape[0]):
+            length_score = min(1.0, max(0.0, (length[i] - 25.0) / (500.0 - 25.0)))
+
+            if order[i] == 1:
+                order_score = 0.3
+            elif order[i] == 2:
+                order_score = 0.6
+            else:
+                order_score = 1.0
+
+            if np.isnan(da[i]):
+                da_score = 0.5
+            else:
+                da_score = min(1.0, max(0.0, (da[i] - 0.1) / (5.0 - 0.1)))
+
+            s = sinuosity[i]
+            if np.isnan(s):
+                sinuosity_score = 0.5
+            elif s < 1.1:
+                sinuosity_score = 0.2
+            elif s < 1.3:
+                sinuosity_score = 0.6
+            elif s < 2.0:
+                sinuosity_score = 1.0
+            else:
+                sinuosity_score = 0.8
+
+            out[i] = (
+                0.2 * length_score +
+                0.2 * order_score +
+                0.4 * da_score +
+                0.2 * sinuosity_score
+            )
+
+
 if __name__ == '__main__':
     main()
@@ -2,13 +2,12 @@
 """
 Generate PMTiles from processed raster and vector data.
 
-This script uses external tools (gdal2tiles, tippecanoe, mb-util) to create PMTiles
+This script uses external tools (gdal2tiles, tippecanoe, pmtiles) to create PMTiles
 for client-side rendering with MapLibre GL JS.
 
 Prerequisites:
     - GDAL (gdal2tiles.py, gdal_translate)
     - Tippecanoe (for vector tiles)
-    - mb-util (for converting XYZ to MBTiles)
     - pmtiles CLI (for PMTiles conversion)
 
 Usage:
@@ -16,15 +15,51 @@ Usage:
 """
 
 import click
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
+import rasterio
 import subprocess
 import json
+import os
+import shutil
+import sqlite3
 import sys
+import tempfile
+from threading import Lock
+from typing import Dict
 from tqdm import tqdm
 
 # Add path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
-from lib.tools import ensure_tools_available, RASTER_TOOLS, VECTOR_TOOLS, PMTILES_TOOLS
+from lib.tools import ensure_tools_available, check_tool, run_tool, check_gdal_minimum_version, RASTER_TOOLS, VECTOR_TOOLS, PMTILES_TOOLS
+from lib.cache import file_fingerprint, cache_key, is_cached, write_cache_key, clear_cache_key
+from lib.layers import list_layers
+
+# Layers are independent subprocess pipelines; run this many at once
+MAX_PARALLEL_JOBS = 4
+
+# Raster intermediates (VRT, thousands of small XYZ PNGs, MBTiles) are staged
+# on tmpfs when there is room, assuming tiles take at most this many bytes per
+# source byte
+TMPFS_DIR = Path('/dev/shm')
+XYZ_SIZE_FACTOR = 32
+
+# Bytes of tmpfs promised to raster layers still running, by staging dir.
+# Concurrent layers reserve against this tally so together they cannot
+# over-commit tmpfs; free space alone only reflects what is already written
+_tmpfs_reservations: Dict[Path, int] = {}
+_tmpfs_lock = Lock()
+
+# Tiles per executemany() call when packing MBTiles
+MBTILES_BATCH_SIZE = 10_000
+
+# GeoPackages at least this large are staged as FlatGeobuf, which tippecanoe
+# reads in parallel; smaller ones are streamed as GeoJSONSeq
+FGB_MIN_BYTES = 16 << 20
+
+# Mixed into every cache key so outputs are rebuilt when this script changes
+SCRIPT_FINGERPRINT = file_fingerprint(Path(__file__))
 
 
 @click.command()
@@ -70,12 +105,23 @@ from lib.tools import ensure_tools_available, RASTER_TOOLS, VECTOR_TOOLS, PMTILE
     default='cubic',
     help='Resampling kernel for raster tiles (default: cubic)'
 )
+@click.option(
+    '--gdal-processes',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Raster tiling workers per layer, as gdal2tiles processes or gdal raster tile threads (default: CPU cores split across concurrent layers)'
+)
+@click.option(
+    '--force',
+    is_flag=True,
+    help='Rebuild every output even if its inputs are unchanged'
+)
 @click.option(
     '--check-tools',
     is_flag=True,
     help='Check required tools and exit'
 )
-def main(data_dir, output_dir, min_zoom, max_zoom, tile_size, contour_interval, raster_resampling, check_tools):
+def main(data_dir, output_dir, min_zoom, max_zoom, tile_size, contour_interval, raster_resampling, gdal_processes, force, check_tools):
     """Generate PMTiles from processed data."""
 
     # Define all required tools
@@ -85,7 +131,6 @@ def main(data_dir, output_dir, min_zoom, max_zoom, tile_size, contour_interval,
         'gdal_contour',
         'gdaldem',
         'tippecanoe',
-        'mb-util',
         'pmtiles',
         'ogr2ogr'
     ]
@@ -118,49 +163,9 @@ def main(data_dir, output_dir, min_zoom, max_zoom, tile_size, contour_interval,
         'aspect': data_path / 'dem' / 'aspect.tif',
     }
 
-    for name, raster_file in raster_files.items():
-        if raster_file.exists():
-            click.echo(f"\nProcessing {name}...")
-            # Use nearest for aspect (color-relief) to avoid blending colors
-            effective_resampling = raster_resampling
-            if name == 'aspect' and raster_resampling.lower() in ['lanczos', 'cubic', 'bilinear']:
-                click.echo("  Aspect is color-relief categorical; overriding resampling to 'nearest' for clean color boundaries")
-                effective_resampling = 'nearest'
-
-            generate_raster_pmtiles(
-                raster_file,
-                output_path / f"{name}.pmtiles",
-                min_zoom,
-                max_zoom,
-                tile_size,
-                effective_resampling
-            )
-        else:
-            click.echo(f"Warning: {name} not found at {raster_file}")
-
-    # Generate contours from filled DEM
+    # Vector tiles (streams, geology, contours, fairfax hydrology, fairfax watersheds, fairfax stormwater)
     filled_dem = data_path / 'dem' / 'filled_dem.tif'
     contours_gpkg = data_path / 'contours.gpkg'
-
-    if filled_dem.exists():
-        click.echo(f"\nGenerating contours (interval: {contour_interval}m)...")
-        try:
-            subprocess.run([
-                'gdal_contour',
-                '-a', 'elevation',
-                '-i', str(contour_interval),
-                str(filled_dem),
-                str(contours_gpkg)
-            ], check=True, capture_output=True)
-            click.echo(f"  Created {contours_gpkg}")
-        except subprocess.CalledProcessError as e:
-            click.echo(f"  Error generating contours: {e}")
-        except FileNotFoundError:
-            click.echo(f"  Error: gdal_contour not found. Install GDAL.")
-    else:
-        click.echo(f"\nWarning: Filled DEM not found at {filled_dem}, skipping contours")
-
-    # Vector tiles (streams, geology, contours, fairfax hydrology, fairfax watersheds, fairfax stormwater)
     vector_files = {
         'streams': data_path / 'streams.gpkg',
         'geology': data_path / 'geology.gpkg',
@@ -174,27 +179,109 @@ def main(data_dir, output_dir, min_zoom, max_zoom, tile_size, contour_interval,
         'inadequate_outfall_points': data_path / 'inadequate_outfall_points.gpkg',
     }
 
-    for name, vector_file in vector_files.items():
-        if vector_file.exists():
-            click.echo(f"\nProcessing {name}...")
-            generate_vector_pmtiles(
-                vector_file,
-                output_path / f"{name}.pmtiles",
-                min_zoom,
-                max_zoom,
-                layer_name=name
-            )
+    # Each layer is its own chain of child processes, so threads are enough
+    # to overlap them. Split the cores between concurrent gdal2tiles and
+    # tippecanoe runs.
+    max_workers = min(MAX_PARALLEL_JOBS, len(raster_files) + len(vector_files))
+    cores_per_layer = max(1, (os.cpu_count() or MAX_PARALLEL_JOBS) // max_workers)
+    gdal2tiles_processes = gdal_processes or cores_per_layer
+    # GDAL 3.11+ ships a native C++ tiler; gdal2tiles.py is the fallback
+    native_tiler = check_tool('gdal') and check_gdal_minimum_version(3, 11)
+    click.echo(f"Raster tiler: {'gdal raster tile' if native_tiler else 'gdal2tiles.py'}")
+    click.echo(f"Raster tiling workers per layer: {gdal2tiles_processes}")
+    click.echo(f"Tippecanoe threads per vector layer: {cores_per_layer}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+
+        for name, raster_file in raster_files.items():
+            if raster_file.exists():
+                click.echo(f"\nProcessing {name}...")
+                # Use nearest for aspect (color-relief) to avoid blending colors
+                effective_resampling = raster_resampling
+                if name == 'aspect' and raster_resampling.lower() in ['lanczos', 'cubic', 'bilinear']:
+                    click.echo("  Aspect is color-relief categorical; overriding resampling to 'nearest' for clean color boundaries")
+                    effective_resampling = 'nearest'
+
+                future = executor.submit(
+                    generate_raster_pmtiles,
+                    raster_file,
+                    output_path / f"{name}.pmtiles",
+                    min_zoom,
+                    max_zoom,
+                    tile_size,
+                    effective_resampling,
+                    gdal2tiles_processes,
+                    native_tiler=native_tiler,
+                    use_cache=not force
+                )
+                futures[future] = name
+            else:
+                click.echo(f"Warning: {name} not found at {raster_file}")
+
+        # Generate contours from filled DEM while the raster tiles build;
+        # the contours vector layer depends on it
+        if filled_dem.exists():
+            contours_key = cache_key('contours', SCRIPT_FINGERPRINT, file_fingerprint(filled_dem), contour_interval)
+            if not force and is_cached(contours_gpkg, contours_key):
+                click.echo(f"\nContours up to date, skipping ({contours_gpkg})")
+            else:
+                click.echo(f"\nGenerating contours (interval: {contour_interval}m)...")
+                clear_cache_key(contours_gpkg)
+                try:
+                    # Multi-threaded block decoding of the DEM, limited to this
+                    # layer's share of the cores while the rasters build
+                    run_tool([
+                        'gdal_contour',
+                        '-a', 'elevation',
+                        '-i', str(contour_interval),
+                        str(filled_dem),
+                        str(contours_gpkg)
+                    ], env={**os.environ, 'GDAL_NUM_THREADS': str(cores_per_layer)})
+                    write_cache_key(contours_gpkg, contours_key)
+                    click.echo(f"  Created {contours_gpkg}")
+                except subprocess.CalledProcessError as e:
+                    click.echo(f"  Error generating contours: {e}")
+                except FileNotFoundError:
+                    click.echo(f"  Error: gdal_contour not found. Install GDAL.")
         else:
-            click.echo(f"Warning: {name} not found at {vector_file}")
+            click.echo(f"\nWarning: Filled DEM not found at {filled_dem}, skipping contours")
+
+        for name, vector_file in vector_files.items():
+            if vector_file.exists():
+                click.echo(f"\nProcessing {name}...")
+                future = executor.submit(
+                    generate_vector_pmtiles,
+                    vector_file,
+                    output_path / f"{name}.pmtiles",
+                    min_zoom,
+                    max_zoom,
+                    layer_name=name,
+                    threads=cores_per_layer,
+                    use_cache=not force
+                )
+                futures[future] = name
+            else:
+                click.echo(f"Warning: {name} not found at {vector_file}")
+
+        for future in as_completed(futures):
+            future.result()
 
     click.echo("\nTile generation complete!")
 
 
-def generate_raster_pmtiles(input_file: Path, output_file: Path, min_zoom: int, max_zoom: int, tile_size: int, raster_resampling: str):
-    """Generate PMTiles from raster data."""
+def generate_raster_pmtiles(input_file: Path, output_file: Path, min_zoom: int, max_zoom: int, tile_size: int, raster_resampling: str, processes: int = 4, native_tiler: bool = False, use_cache: bool = True):
+    """Generate PMTiles from raster data, skipping work if inputs are unchanged."""
+
+    key = cache_key('raster', SCRIPT_FINGERPRINT, file_fingerprint(input_file), min_zoom, max_zoom, tile_size, raster_resampling, native_tiler)
+    if use_cache and is_cached(output_file, key):
+        click.echo(f"  Up to date, skipping ({output_file.name})")
+        return
+    clear_cache_key(output_file)
 
     temp_dir = output_file.parent / 'temp_tiles'
     temp_dir.mkdir(exist_ok=True)
+    staging_dir = raster_staging_dir(temp_dir, input_file)
 
     try:
         # Step 1: Convert to web-friendly format if needed
@@ -203,7 +290,9 @@ def generate_raster_pmtiles(input_file: Path, output_file: Path, min_zoom: int,
         # Slope: Byte, 0-255 (scaled 0-45 degrees)
         # Aspect: RGB color-relief (no conversion needed)
 
-        temp_tif = temp_dir / f"{input_file.stem}_web.tif"
+        # Conversions are written as VRTs: gdal2tiles reads the source
+        # blocks through them, so no converted copy of the raster hits disk
+        temp_tif = staging_dir / f"{input_file.stem}_web.vrt"
 
         # Check if aspect is color-relief (RGB) - skip conversion
         if 'aspect' in input_file.stem:
@@ -211,99 +300,211 @@ def generate_raster_pmtiles(input_file: Path, output_file: Path, min_zoom: int,
             click.echo(f"  Using color-relief aspect (RGB) directly...")
             temp_tif = input_file  # Use original file
         elif 'hillshade' in input_file.stem or 'slope' in input_file.stem:
-            # Hillshade and slope are already Byte from prepare_dem.py
-            # Just ensure proper tiling and compression
-            click.echo(f"  Optimizing for tiling...")
-            subprocess.run([
-                'gdal_translate',
-                '-of', 'GTiff',
-                '-co', 'TILED=YES',
-                '-co', 'COMPRESS=LZW',
-                '-ot', 'Byte',
-                str(input_file),
-                str(temp_tif)
-            ], check=True, capture_output=True)
+            if is_byte_raster(input_file):
+                # Hillshade and slope from prepare_dem.py are already Byte
+                click.echo(f"  Using Byte raster directly...")
+                temp_tif = input_file
+            else:
+                click.echo(f"  Preparing Byte view for tiling...")
+                run_tool([
+                    'gdal_translate',
+                    '-of', 'VRT',
+                    '-ot', 'Byte',
+                    str(input_file),
+                    str(temp_tif)
+                ])
         else:
             # Fallback for other rasters (legacy support)
             click.echo(f"  Converting to web format...")
-            subprocess.run([
+            run_tool([
                 'gdal_translate',
-                '-of', 'GTiff',
-                '-co', 'TILED=YES',
-                '-co', 'COMPRESS=LZW',
+                '-of', 'VRT',
                 '-scale',
                 '-ot', 'Byte',
                 str(input_file),
                 str(temp_tif)
-            ], check=True, capture_output=True)
+            ])
 
         # Step 2: Generate XYZ tiles
-        xyz_dir = temp_dir / f"{input_file.stem}_xyz"
+        xyz_dir = staging_dir / f"{input_file.stem}_xyz"
         click.echo(f"  Generating XYZ tiles (zoom {min_zoom}-{max_zoom}, {tile_size}px)...")
 
-        # Map 'nearest' to 'near' for gdal2tiles.py compatibility
-        gdal2tiles_resampling = 'near' if raster_resampling == 'nearest' else raster_resampling
-
-        subprocess.run([
-            'gdal2tiles.py',
-            '--xyz',  # Use XYZ tile numbering (OSM Slippy Map) instead of TMS
-            '--zoom', f'{min_zoom}-{max_zoom}',
-            '--tilesize', str(tile_size),
-            '--processes', '4',
-            '--webviewer', 'none',
-            '-r', gdal2tiles_resampling,
-            str(temp_tif),
-            str(xyz_dir)
-        ], check=True, capture_output=True)
-
-        # Step 3: Convert XYZ to MBTiles (requires mb-util)
-        click.echo(f"  Converting to MBTiles...")
-        temp_mbtiles = temp_dir / f"{input_file.stem}.mbtiles"
-
-        subprocess.run([
-            'mb-util',
-            str(xyz_dir),
-            str(temp_mbtiles)
-        ], check=True, capture_output=True)
-
-        # Step 3.5: Fix MBTiles metadata (mb-util doesn't set format/tile_type)
-        click.echo(f"  Fixing MBTiles metadata...")
-        import sqlite3
-        conn = sqlite3.connect(str(temp_mbtiles))
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('format', 'png')")
-        cursor.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('type', 'overlay')")
-        conn.commit()
-        conn.close()
+        if native_tiler:
+            # Native tile loop (GDAL 3.11+), no per-tile Python overhead
+            run_tool([
+                'gdal', 'raster', 'tile',
+                '--convention', 'xyz',
+                '--min-zoom', str(min_zoom),
+                '--max-zoom', str(max_zoom),
+                '--tile-size', str(tile_size),
+                '--num-threads', str(processes),
+                '--webviewer', 'none',
+                '--resampling', raster_resampling,
+                str(temp_tif),
+                str(xyz_dir)
+            ])
+        else:
+            # Map 'nearest' to 'near' for gdal2tiles.py compatibility
+            gdal2tiles_resampling = 'near' if raster_resampling == 'nearest' else raster_resampling
+
+            run_tool([
+                'gdal2tiles.py',
+                '--xyz',  # Use XYZ tile numbering (OSM Slippy Map) instead of TMS
+                '--zoom', f'{min_zoom}-{max_zoom}',
+                '--tilesize', str(tile_size),
+                '--processes', str(processes),
+                '--webviewer', 'none',
+                '-r', gdal2tiles_resampling,
+                str(temp_tif),
+                str(xyz_dir)
+            ])
+
+        # Step 3: Pack XYZ tiles into MBTiles (with the metadata pmtiles needs)
+        click.echo(f"  Packing MBTiles...")
+        temp_mbtiles = staging_dir / f"{input_file.stem}.mbtiles"
+        tile_count = xyz_to_mbtiles(xyz_dir, temp_mbtiles, name=output_file.stem)
+        click.echo(f"  Packed {tile_count} tiles")
+        # The loose tiles are no longer needed; free the space before converting
+        shutil.rmtree(xyz_dir)
 
         # Step 4: Convert MBTiles to PMTiles (requires pmtiles CLI)
         click.echo(f"  Converting to PMTiles...")
 
-        subprocess.run([
+        run_tool([
             'pmtiles',
             'convert',
             str(temp_mbtiles),
             str(output_file)
-        ], check=True, capture_output=True)
+        ])
 
+        write_cache_key(output_file, key)
         click.echo(f"  Created {output_file}")
 
         # Clean up temporary files
-        import shutil
         if temp_tif.exists() and temp_tif != input_file:
             temp_tif.unlink()
         if temp_mbtiles.exists():
             temp_mbtiles.unlink()
-        if xyz_dir.exists():
-            shutil.rmtree(xyz_dir)
 
     except subprocess.CalledProcessError as e:
         click.echo(f"  Error: {e}")
     except FileNotFoundError:
-        click.echo(f"  Error: Required tool not found (gdal_translate, gdal2tiles.py, mb-util, or pmtiles)")
+        click.echo(f"  Error: Required tool not found (gdal_translate, gdal2tiles.py, or pmtiles)")
         click.echo(f"  Install GDAL: https://gdal.org/")
-        click.echo(f"  Install mb-util: https://github.com/mapbox/mbutil")
         click.echo(f"  Install pmtiles: https://github.com/protomaps/go-pmtiles")
+    finally:
+        # Never leave intermediates behind in RAM-backed storage
+        release_staging_dir(staging_dir)
+
+
+def is_byte_raster(path: Path) -> bool:
+    """Check whether every band of a raster is already 8-bit unsigned."""
+    with rasterio.open(path) as src:
+        return all(dtype == 'uint8' for dtype in src.dtypes)
+
+
+def xyz_to_mbtiles(xyz_dir: Path, mbtiles_file: Path, name: str, tile_format: str = 'png') -> int:
+    """
+    Pack a gdal2tiles --xyz tile directory into an MBTiles file.
+
+    Replaces mb-util and the follow-up metadata fix: tiles (rows flipped to
+    the TMS scheme MBTiles uses) and the format/type metadata are inserted
+    in batches inside one transaction with fsync disabled, and the indexes
+    are created after the bulk load.
+
+    Args:
+        xyz_dir: Directory laid out as {z}/{x}/{y}.{tile_format}
+        mbtiles_file: Output MBTiles path (replaced if it exists)
+        name: Tileset name stored in the metadata
+        tile_format: Tile image extension and MBTiles format
+
+    Returns:
+        Number of tiles written
+    """
+    suffix = f'.{tile_format}'
+
+    def tiles():
+        # os.scandir and unbuffered reads keep the per-tile syscalls down;
+        # deep pyramids hold millions of small files
+        with os.scandir(xyz_dir) as z_entries:
+            for z_entry in z_entries:
+                if not z_entry.name.isdigit():
+                    continue
+                z = int(z_entry.name)
+                with os.scandir(z_entry.path) as x_entries:
+                    for x_entry in x_entries:
+                        if not x_entry.name.isdigit():
+                            continue
+                        x = int(x_entry.name)
+                        with os.scandir(x_entry.path) as y_entries:
+                            for y_entry in y_entries:
+                                if not y_entry.name.endswith(suffix):
+                                    continue
+                                y = int(y_entry.name[:-len(suffix)])
+                                with open(y_entry.path, 'rb', buffering=0) as f:
+                                    yield z, x, (1 << z) - 1 - y, f.read()
+
+    mbtiles_file.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(mbtiles_file), isolation_level=None)
+    try:
+        # Scratch file that is simply rebuilt on failure, so skip fsyncs
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        conn.execute("BEGIN")
+        conn.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+        conn.execute(
+            "CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, "
+            "tile_row INTEGER, tile_data BLOB)"
+        )
+        conn.executemany(
+            "INSERT INTO metadata (name, value) VALUES (?, ?)",
+            [('name', name), ('format', tile_format), ('type', 'overlay')]
+        )
+        tile_count = 0
+        tile_iter = tiles()
+        while batch := list(islice(tile_iter, MBTILES_BATCH_SIZE)):
+            conn.executemany(
+                "INSERT INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+                batch
+            )
+            tile_count += len(batch)
+        # Indexes are built once after the bulk load rather than per row
+        conn.execute("CREATE UNIQUE INDEX name ON metadata (name)")
+        conn.execute("CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)")
+        conn.execute("COMMIT")
+        return tile_count
+    finally:
+        conn.close()
+
+
+def raster_staging_dir(default_dir: Path, source_file: Path) -> Path:
+    """
+    Pick the directory for a raster layer's intermediates (VRT, XYZ tiles, MBTiles).
+
+    Returns a fresh directory on tmpfs when it has room for both the XYZ tiles
+    and their MBTiles copy, so the small-file writes, the packer's reads and
+    pmtiles convert never touch disk; otherwise returns default_dir. The tmpfs
+    space is reserved until release_staging_dir() is called.
+    """
+    if TMPFS_DIR.is_dir():
+        needed = 2 * source_file.stat().st_size * XYZ_SIZE_FACTOR
+        with _tmpfs_lock:
+            available = shutil.disk_usage(TMPFS_DIR).free - sum(_tmpfs_reservations.values())
+            if available > needed:
+                staging_dir = Path(tempfile.mkdtemp(prefix='hydro_tiles_', dir=TMPFS_DIR))
+                _tmpfs_reservations[staging_dir] = needed
+                return staging_dir
+    return default_dir
+
+
+def release_staging_dir(staging_dir: Path):
+    """Delete a tmpfs staging dir from raster_staging_dir() and free its reservation."""
+    with _tmpfs_lock:
+        reserved = _tmpfs_reservations.pop(staging_dir, None)
+    if reserved is not None:
+        shutil.rmtree(staging_dir, ignore_errors=True)
 
 
 def generate_vector_pmtiles(
@@ -311,16 +512,16 @@ def generate_vector_pmtiles(
     output_file: Path,
     min_zoom: int,
     max_zoom: int,
-    layer_name: str
+    layer_name: str,
+    threads: int = 4,
+    use_cache: bool = True
 ):
-    """Generate PMTiles from vector data using Tippecanoe."""
-
-    temp_mbtiles = output_file.with_suffix('.mbtiles')
+    """Generate PMTiles from vector data using Tippecanoe, skipping work if inputs are unchanged."""
 
     try:
         click.echo(f"  Generating vector tiles with Tippecanoe...")
 
-        # Convert to GeoJSON if needed
+        # Pick the source layer to export from GPKG
         source_layer = layer_name
         if input_file.suffix == '.gpkg':
             # For streams, try to find the best available layer
@@ -331,35 +532,16 @@ def generate_vector_pmtiles(
                 # 3. streams_merged (if from NHD fusion workflow)
                 # 4. streams (fallback)
                 candidates = ['streams_t100_filtered', 'streams_t250_filtered', 'streams_merged', 'streams']
-                for candidate in candidates:
-                    try:
-                        subprocess.run(
-                            ['ogrinfo', str(input_file), candidate],
-                            check=True,
-                            capture_output=True
-                        )
-                        source_layer = candidate
-                        click.echo(f"  Using layer: {source_layer}")
-                        break
-                    except subprocess.CalledProcessError:
-                        continue
-
-            temp_geojson = output_file.parent / f"{input_file.stem}.geojson"
-            subprocess.run([
-                'ogr2ogr',
-                '-f', 'GeoJSON',
-                str(temp_geojson),
-                str(input_file),
-                source_layer  # Specify which layer to export from GPKG
-            ], check=True, capture_output=True)
-            input_for_tippecanoe = temp_geojson
-        else:
-            input_for_tippecanoe = input_file
+                available = list_layers(input_file)
+                source_layer = next((c for c in candidates if c in available), layer_name)
+                click.echo(f"  Using layer: {source_layer}")
 
-        # Run Tippecanoe with better detail preservation for streams
+        # Run Tippecanoe with better detail preservation for streams;
+        # Tippecanoe >= 2.17 writes PMTiles directly from the .pmtiles suffix
         tippecanoe_cmd = [
             'tippecanoe',
-            '-o', str(temp_mbtiles),
+            '-o', str(output_file),
+            '--force',  # Replace the previous output
             '-l', layer_name,
             '-z', str(max_zoom),
             '-Z', str(min_zoom),
@@ -381,33 +563,58 @@ def generate_vector_pmtiles(
                 '--no-feature-limit'
             ])
 
-        tippecanoe_cmd.append(str(input_for_tippecanoe))
-
-        subprocess.run(tippecanoe_cmd, check=True, capture_output=True)
-
-        # Convert to PMTiles (requires pmtiles CLI)
-        click.echo(f"  Converting to PMTiles...")
-        subprocess.run([
-            'pmtiles',
-            'convert',
-            str(temp_mbtiles),
-            str(output_file)
-        ], check=True, capture_output=True)
+        key = cache_key('vector', SCRIPT_FINGERPRINT, file_fingerprint(input_file), source_layer, tippecanoe_cmd)
+        if use_cache and is_cached(output_file, key):
+            click.echo(f"  Up to date, skipping ({output_file.name})")
+            return
+        clear_cache_key(output_file)
+
+        tippecanoe_env = {**os.environ, 'TIPPECANOE_MAX_THREADS': str(threads)}
+
+        if input_file.suffix == '.gpkg' and input_file.stat().st_size >= FGB_MIN_BYTES:
+            # Stage large layers as FlatGeobuf so Tippecanoe can read them in
+            # parallel instead of parsing GeoJSON on a single core
+            with tempfile.TemporaryDirectory(dir=output_file.parent) as fgb_dir:
+                fgb_file = Path(fgb_dir) / f"{layer_name}.fgb"
+                run_tool([
+                    'ogr2ogr',
+                    '-f', 'FlatGeobuf',
+                    str(fgb_file),
+                    str(input_file),
+                    source_layer  # Specify which layer to export from GPKG
+                ])
+                tippecanoe_cmd.append(str(fgb_file))
+                run_tool(tippecanoe_cmd, env=tippecanoe_env)
+        elif input_file.suffix == '.gpkg':
+            # Stream small GPKG layers to Tippecanoe's stdin as GeoJSONSeq
+            # instead of staging a full GeoJSON copy on disk
+            ogr2ogr = subprocess.Popen([
+                'ogr2ogr',
+                '-f', 'GeoJSONSeq',
+                '/vsistdout/',
+                str(input_file),
+                source_layer  # Specify which layer to export from GPKG
+            ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            try:
+                run_tool(tippecanoe_cmd, stdin=ogr2ogr.stdout, env=tippecanoe_env)
+            finally:
+                ogr2ogr.stdout.close()
+                ogr2ogr.wait()
+            if ogr2ogr.returncode != 0:
+                raise subprocess.CalledProcessError(ogr2ogr.returncode, ogr2ogr.args)
+        else:
+            tippecanoe_cmd.append(str(input_file))
+            run_tool(tippecanoe_cmd, env=tippecanoe_env)
 
+        write_cache_key(output_file, key)
         click.echo(f"  Created {output_file}")
 
-        # Clean up
-        if temp_mbtiles.exists():
-            temp_mbtiles.unlink()
-        if input_for_tippecanoe != input_file:
-            input_for_tippecanoe.unlink()
-
     except subprocess.CalledProcessError as e:
         click.echo(f"  Error: {e}")
     except FileNotFoundError as e:
-        click.echo(f"  Error: Required tool not found (tippecanoe or pmtiles)")
-        click.echo(f"  Install Tippecanoe: https://github.com/felt/tippecanoe")
-        click.echo(f"  Install pmtiles: https://github.com/protomaps/go-pmtiles")
+        click.echo(f"  Error: Required tool not found (ogr2ogr or tippecanoe)")
+        click.echo(f"  Install GDAL: https://gdal.org/")
+        click.echo(f"  Install Tippecanoe (2.17+): https://github.com/felt/tippecanoe")
 
 
 if __name__ == '__main__':
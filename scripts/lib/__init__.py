@@ -4,6 +4,7 @@ Shared utilities for hydro-map data processing scripts.
 
 from .tools import (
     check_tool,
+    run_tool,
     validate_tools,
     ensure_tools_available,
     validate_environment_for_tile_generation,
@@ -11,13 +12,36 @@ from .tools import (
     VECTOR_TOOLS,
     PMTILES_TOOLS
 )
+from .raster_stats import (
+    new_histogram,
+    update_histogram,
+    histogram_percentiles
+)
+from .cache import (
+    file_fingerprint,
+    cache_key,
+    is_cached,
+    write_cache_key,
+    clear_cache_key
+)
+from .layers import list_layers
 
 __all__ = [
     'check_tool',
+    'run_tool',
     'validate_tools',
     'ensure_tools_available',
     'validate_environment_for_tile_generation',
     'RASTER_TOOLS',
     'VECTOR_TOOLS',
-    'PMTILES_TOOLS'
+    'PMTILES_TOOLS',
+    'new_histogram',
+    'update_histogram',
+    'histogram_percentiles',
+    'file_fingerprint',
+    'cache_key',
+    'is_cached',
+    'write_cache_key',
+    'clear_cache_key',
+    'list_layers'
 ]
\ No newline at end of file
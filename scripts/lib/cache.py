@@ -0,0 +1,84 @@
+"""
+Input-keyed caching for expensive pipeline outputs.
+
+An output is reused when the sidecar ``<output>.cachekey`` file holds the
+same key that the current inputs hash to. Keys are written only after an
+output has been produced successfully.
+"""
+
+import hashlib
+from pathlib import Path
+
+# Leading bytes of an input file mixed into its fingerprint
+FINGERPRINT_BYTES = 1 << 20
+
+
+def file_fingerprint(path: Path) -> str:
+    """
+    Cheap content fingerprint of an input file.
+
+    Combines size, modification time and the first FINGERPRINT_BYTES of the
+    file, so large rasters are never read in full.
+
+    Args:
+        path: Input file
+
+    Returns:
+        Hex digest identifying the file's current state
+    """
+    stat = path.stat()
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+def cache_key(*parts) -> str:
+    """
+    Hash every input that determines an output into a single key.
+
+    Args:
+        *parts: Values whose repr() identifies the inputs (paths, options,
+            fingerprints, remote edit dates, ...)
+
+    Returns:
+        Hex digest key
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _key_file(output_file: Path) -> Path:
+    return output_file.with_name(output_file.name + '.cachekey')
+
+
+def is_cached(output_file: Path, key: str) -> bool:
+    """
+    Check whether output_file exists and was built from inputs matching key.
+
+    Args:
+        output_file: Pipeline output
+        key: Key of the current inputs
+
+    Returns:
+        True if the output can be reused
+    """
+    key_file = _key_file(output_file)
+    return (
+        output_file.exists()
+        and key_file.exists()
+        and key_file.read_text().strip() == key
+    )
+
+
+def write_cache_key(output_file: Path, key: str):
+    """Record the key of the inputs output_file was just built from."""
+    _key_file(output_file).write_text(key + '\n')
+
+
+def clear_cache_key(output_file: Path):
+    """Forget the key of output_file before it is rebuilt."""
+    _key_file(output_file).unlink(missing_ok=True)
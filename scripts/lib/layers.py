@@ -0,0 +1,31 @@
+"""
+Cached layer discovery for vector datasets.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+import pyogrio
+
+
+@lru_cache(maxsize=32)
+def _list_layers(path: str, mtime_ns: int) -> Tuple[str, ...]:
+    return tuple(name for name, _ in pyogrio.list_layers(path))
+
+
+def list_layers(path: Path) -> Tuple[str, ...]:
+    """
+    List the layer names in a vector dataset, opening it at most once per run.
+
+    Results are cached per path and modification time, so a dataset rewritten
+    mid-run is listed again.
+
+    Args:
+        path: Vector dataset (e.g. GeoPackage)
+
+    Returns:
+        Layer names in dataset order
+    """
+    path = Path(path).resolve()
+    return _list_layers(str(path), path.stat().st_mtime_ns)
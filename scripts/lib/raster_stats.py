@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Streaming raster statistics for data processing pipeline.
+Percentiles are derived from a fixed-width histogram accumulated block by
+block, so large rasters never have to be held in memory or sorted.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+# Histogram range and resolution for TWI rasters. Values outside the range
+# are clamped into the end bins.
+TWI_HIST_MIN = -20.0
+TWI_HIST_MAX = 60.0
+TWI_HIST_BIN = 0.001
+
+
+def new_histogram(lo: float, hi: float, bin_width: float) -> np.ndarray:
+    """
+    Create an empty fixed-width histogram.
+
+    Args:
+        lo: Lower edge of the first bin
+        hi: Upper edge of the last bin
+        bin_width: Width of each bin
+
+    Returns:
+        Zeroed int64 count array
+    """
+    return np.zeros(int(round((hi - lo) / bin_width)), dtype=np.int64)
+
+
+def update_histogram(hist: np.ndarray, values: np.ndarray, lo: float, bin_width: float) -> None:
+    """
+    Add a block of values to a histogram in place.
+
+    Args:
+        hist: Histogram created by new_histogram
+        values: 1-D array of valid values
+        lo: Lower edge of the first bin
+        bin_width: Width of each bin
+    """
+    if values.size == 0:
+        return
+    bins = ((values - lo) / bin_width).astype(np.int64)
+    np.clip(bins, 0, hist.size - 1, out=bins)
+    hist += np.bincount(bins, minlength=hist.size)
+
+
+def histogram_percentiles(
+    hist: np.ndarray,
+    percentiles: Sequence[float],
+    lo: float,
+    bin_width: float
+) -> List[float]:
+    """
+    Derive percentiles from the cumulative counts of a histogram.
+
+    Args:
+        hist: Accumulated histogram
+        percentiles: Percentiles to report (0-100)
+        lo: Lower edge of the first bin
+        bin_width: Width of each bin
+
+    Returns:
+        List of bin-center values, accurate to within one bin width
+    """
+    cdf = np.cumsum(hist)
+    total = cdf[-1]
+    results = []
+    for q in percentiles:
+        idx = int(np.searchsorted(cdf, total * q / 100.0, side='left'))
+        results.append(lo + (idx + 0.5) * bin_width)
+    return results
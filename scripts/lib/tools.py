@@ -4,17 +4,45 @@ Tool validation utilities for data processing pipeline.
 Ensures required external tools are available before running long operations.
 """
 
+import json
+import os
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Lock
 from typing import List, Tuple, Optional, Dict
 from pathlib import Path
 
+# Bytes of a failed tool's stderr kept for the error
+STDERR_TAIL_BYTES = 64 * 1024
 
+# Version probes are subprocess startups; run up to this many at once
+MAX_PROBE_WORKERS = 16
+
+# Version strings persisted across runs, keyed by executable path, mtime,
+# size and flag so reinstalling a tool invalidates its entry
+PROBE_CACHE_FILE = (
+    Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+    / 'hydro-map' / 'tool_versions.json'
+)
+_probe_cache_lock = Lock()
+
+# Version from gdalinfo output like "GDAL 3.5.1, released 2022/06/30"
+_GDAL_VERSION_RE = re.compile(r'GDAL (\d+)\.(\d+)\.(\d+)')
+
+
+@lru_cache(maxsize=None)
 def check_tool(tool: str) -> bool:
     """
     Check if an external tool is available in the system PATH.
 
+    Lookups (and the version helpers below) are cached for the life of the
+    process; call check_tool.cache_clear() after changing PATH.
+
     Args:
         tool: Name of the tool to check
 
@@ -24,10 +52,31 @@ def check_tool(tool: str) -> bool:
     return shutil.which(tool) is not None
 
 
+def _load_probe_cache() -> Dict[str, str]:
+    try:
+        return json.loads(PROBE_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_probe_cache(cache: Dict[str, str]) -> None:
+    try:
+        PROBE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = PROBE_CACHE_FILE.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(cache, indent=2, sort_keys=True))
+        tmp_file.replace(PROBE_CACHE_FILE)
+    except OSError:
+        pass  # Caching is best effort
+
+
+@lru_cache(maxsize=None)
 def get_tool_version(tool: str, version_flag: str = "--version") -> Optional[str]:
     """
     Get the version string for a tool.
 
+    Results are also persisted to PROBE_CACHE_FILE, so later runs skip the
+    subprocess until the executable changes.
+
     Args:
         tool: Name of the tool
         version_flag: Flag to use for version check (default: --version)
@@ -35,9 +84,31 @@ def get_tool_version(tool: str, version_flag: str = "--version") -> Optional[str
     Returns:
         Version string if available, None otherwise
     """
-    if not check_tool(tool):
+    tool_path = shutil.which(tool)
+    if tool_path is None:
         return None
 
+    try:
+        stat = os.stat(tool_path)
+    except OSError:
+        return None
+    key = f"{os.path.realpath(tool_path)}|{stat.st_mtime_ns}|{stat.st_size}|{version_flag}"
+
+    with _probe_cache_lock:
+        cached = _load_probe_cache().get(key)
+    if cached is not None:
+        return cached
+
+    version = _probe_tool_version(tool, version_flag)
+    if version is not None:
+        with _probe_cache_lock:
+            cache = _load_probe_cache()
+            cache[key] = version
+            _save_probe_cache(cache)
+    return version
+
+
+def _probe_tool_version(tool: str, version_flag: str) -> Optional[str]:
     try:
         result = subprocess.run(
             [tool, version_flag],
@@ -74,21 +145,48 @@ def validate_tools(required: List[str]) -> Tuple[bool, List[str]]:
     return len(missing) == 0, missing
 
 
+def run_tool(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """
+    Run an external tool, raising CalledProcessError if it fails.
+
+    Stdout is discarded and stderr is spooled to a temporary file rather than
+    buffered in memory, so chatty long runs (gdal2tiles, tippecanoe progress)
+    stay bounded. Only the tail of stderr is attached to the error.
+
+    Args:
+        cmd: Command and arguments
+        **kwargs: Extra subprocess.run arguments (stdin, env, ...)
+
+    Returns:
+        Completed process
+    """
+    with tempfile.TemporaryFile() as log:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=log, **kwargs)
+        if result.returncode != 0:
+            size = log.seek(0, os.SEEK_END)
+            log.seek(max(0, size - STDERR_TAIL_BYTES))
+            stderr = log.read().decode(errors='replace')
+            raise subprocess.CalledProcessError(result.returncode, cmd, stderr=stderr)
+    return result
+
+
 def check_python_package(package: str) -> bool:
     """
     Check if a Python package is installed.
 
+    Only locates the package (find_spec) rather than importing it, so heavy
+    packages like rasterio or geopandas are not loaded just to be checked.
+
     Args:
         package: Name of the Python package
 
     Returns:
         True if installed, False otherwise
     """
+    import importlib.util
     try:
-        import importlib
-        importlib.import_module(package)
-        return True
-    except ImportError:
+        return importlib.util.find_spec(package) is not None
+    except (ImportError, ValueError):
         return False
 
 
@@ -123,8 +221,7 @@ VECTOR_TOOLS = [
 ]
 
 PMTILES_TOOLS = [
-    'pmtiles',
-    'mb-util'
+    'pmtiles'
 ]
 
 WHITEBOX_TOOLS = [
@@ -145,13 +242,20 @@ def print_tool_status(tools: List[str], verbose: bool = False) -> None:
 
     max_tool_len = max(len(tool) for tool in tools)
 
+    # Overlap the version subprocesses instead of waiting on each in turn
+    versions = {}
+    available_tools = [tool for tool in tools if check_tool(tool)]
+    if verbose and available_tools:
+        with ThreadPoolExecutor(max_workers=min(MAX_PROBE_WORKERS, len(available_tools))) as executor:
+            versions = dict(zip(available_tools, executor.map(get_tool_version, available_tools)))
+
     for tool in tools:
         available = check_tool(tool)
         status = "✓" if available else "✗"
         status_text = "Available" if available else "Missing"
 
         if verbose and available:
-            version = get_tool_version(tool)
+            version = versions.get(tool)
             if version:
                 print(f"{status} {tool:<{max_tool_len}} : {status_text} ({version})")
             else:
@@ -202,9 +306,6 @@ def ensure_tools_available(
             print("  • PMTiles: pip install pmtiles")
             print("            or: npm install -g pmtiles")
 
-        if 'mb-util' in missing:
-            print("  • mb-util: pip install mb-util")
-
         print()
 
         if exit_on_missing:
@@ -246,6 +347,7 @@ def ensure_python_packages_available(
     return True
 
 
+@lru_cache(maxsize=None)
 def get_gdal_version() -> Optional[Tuple[int, int, int]]:
     """
     Get the GDAL version as a tuple of (major, minor, patch).
@@ -257,9 +359,7 @@ def get_gdal_version() -> Optional[Tuple[int, int, int]]:
     if not version_str:
         return None
 
-    # Parse version from string like "GDAL 3.5.1, released 2022/06/30"
-    import re
-    match = re.search(r'GDAL (\d+)\.(\d+)\.(\d+)', version_str)
+    match = _GDAL_VERSION_RE.search(version_str)
     if match:
         return tuple(int(x) for x in match.groups())
 
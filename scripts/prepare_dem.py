@@ -146,6 +146,7 @@ def main(input, output, breach, utm_zone, hemisphere):
             '-az', '315',
             '-alt', '45',
             '-co', 'COMPRESS=LZW',
+            '-co', 'TILED=YES',
             str(dem_utm),
             str(hillshade)
         ], check=True)
@@ -171,6 +172,7 @@ def main(input, output, breach, utm_zone, hemisphere):
             '-scale', '0', '45', '0', '255',
             '-ot', 'Byte',
             '-co', 'COMPRESS=LZW',
+            '-co', 'TILED=YES',
             str(slope_deg),
             str(slope)
         ], check=True)
@@ -194,6 +196,7 @@ def main(input, output, breach, utm_zone, hemisphere):
             'gdaldem', 'color-relief',
             '-alpha',
             '-co', 'COMPRESS=LZW',
+            '-co', 'TILED=YES',
             str(aspect_deg),
             str(aspect_colors),
             str(aspect)
@@ -21,6 +21,7 @@ import whitebox
 from tqdm import tqdm
 import numpy as np
 import geopandas as gpd
+import shapely
 
 
 def calculate_drainage_areas_from_flow_acc(streams_gdf, flow_acc_path):
@@ -30,7 +31,8 @@ def calculate_drainage_areas_from_flow_acc(streams_gdf, flow_acc_path):
     Samples flow accumulation at downstream endpoint and converts to km².
     """
     import rasterio
-    from rasterio.transform import rowcol
+    from rasterio.transform import rowcol, xy
+    from pyproj import Transformer
 
     with rasterio.open(flow_acc_path) as src:
         # Get pixel area in km²
@@ -48,41 +50,50 @@ def calculate_drainage_areas_from_flow_acc(streams_gdf, flow_acc_path):
             pixel_height_m = abs(src.transform[4])
             pixel_area_km2 = (pixel_width_m * pixel_height_m) / 1e6
 
-        drainage_areas = []
-
-        for idx, row in streams_gdf.iterrows():
-            geom = row.geometry
-            # Get downstream point (last coordinate)
-            if geom.geom_type == 'LineString':
-                downstream_point = geom.coords[-1]
-            elif geom.geom_type == 'MultiLineString':
-                downstream_point = list(geom.geoms[-1].coords)[-1]
-            else:
-                drainage_areas.append(np.nan)
-                continue
+        # Downstream point of each segment: last coordinate of the (last)
+        # line, extracted for all geometries at once; NaN for non-lines
+        geoms = np.asarray(streams_gdf.geometry.values)
+        is_line = np.isin(
+            shapely.get_type_id(geoms),
+            [shapely.GeometryType.LINESTRING, shapely.GeometryType.MULTILINESTRING]
+        )
+        coords, owner = shapely.get_coordinates(geoms[is_line], return_index=True)
+        last = np.ones(len(owner), dtype=bool)
+        last[:-1] = owner[1:] != owner[:-1]
+        xs = np.full(len(geoms), np.nan)
+        ys = np.full(len(geoms), np.nan)
+        downstream = np.flatnonzero(is_line)[owner[last]]
+        xs[downstream] = coords[last, 0]
+        ys[downstream] = coords[last, 1]
+
+        # Transform to raster CRS if needed, as arrays
+        if streams_gdf.crs != src.crs:
+            transformer = Transformer.from_crs(streams_gdf.crs, src.crs.to_wkt(), always_xy=True)
+            xs, ys = transformer.transform(xs, ys)
+
+        drainage_areas = np.full(len(streams_gdf), np.nan)
+
+        finite = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+        rows, cols = rowcol(src.transform, xs[finite], ys[finite])
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        inside = (rows >= 0) & (rows < src.height) & (cols >= 0) & (cols < src.width)
+        targets, rows, cols = finite[inside], rows[inside], cols[inside]
+
+        # Sample pixel centers in block order so each block is decoded once
+        block_height, block_width = src.block_shapes[0]
+        order = np.lexsort((cols // block_width, rows // block_height))
+        targets, rows, cols = targets[order], rows[order], cols[order]
+        sample_xs, sample_ys = np.asarray(xy(src.transform, rows, cols))
+        flow_accum = np.fromiter(
+            (v[0] for v in src.sample(zip(sample_xs, sample_ys), indexes=1)),
+            dtype=np.float64,
+            count=len(targets)
+        )
 
-            # Transform to raster CRS if needed
-            if streams_gdf.crs != src.crs:
-                from shapely.geometry import Point
-                point_gdf = gpd.GeoDataFrame([1], geometry=[Point(downstream_point)], crs=streams_gdf.crs)
-                point_proj = point_gdf.to_crs(src.crs).geometry.values[0]
-                x, y = point_proj.x, point_proj.y
-            else:
-                x, y = downstream_point
-
-            # Sample raster
-            r, c = rowcol(src.transform, x, y)
-
-            if 0 <= r < src.height and 0 <= c < src.width:
-                flow_accum_value = src.read(1, window=((r, r+1), (c, c+1)))[0, 0]
-                if src.nodata is not None and flow_accum_value == src.nodata:
-                    drainage_area_km2 = np.nan
-                else:
-                    drainage_area_km2 = flow_accum_value * pixel_area_km2
-            else:
-                drainage_area_km2 = np.nan
-
-            drainage_areas.append(drainage_area_km2)
+        # Convert flow accumulation (number of cells) to drainage area
+        if src.nodata is not None:
+            flow_accum[flow_accum == src.nodata] = np.nan
+        drainage_areas[targets] = flow_accum * pixel_area_km2
 
         streams_gdf['drainage_area_sqkm'] = drainage_areas
 
@@ -216,8 +227,8 @@ def extract_streams_at_threshold(wbt, flow_acc_path, flow_dir_path, output_path,
     click.echo("Converting to GeoPackage...")
     try:
         import rasterio
-        from rasterio.transform import rowcol
-        from shapely.geometry import Point
+        from rasterio.transform import rowcol, xy
+        from pyproj import Transformer
 
         # Check if file exists
         if not streams_vector.exists():
@@ -237,32 +248,34 @@ def extract_streams_at_threshold(wbt, flow_acc_path, flow_dir_path, output_path,
 
         # Add stream order by sampling the raster at stream midpoints
         click.echo("  Sampling stream order...")
-        orders = []
         with rasterio.open(stream_order) as src:
-            for idx, row in streams_gdf.iterrows():
-                # Get midpoint of stream segment
-                midpoint = row.geometry.interpolate(0.5, normalized=True)
-
-                # Transform to raster CRS if needed
-                if streams_gdf.crs != src.crs:
-                    midpoint_gdf = gpd.GeoDataFrame([1], geometry=[midpoint], crs=streams_gdf.crs)
-                    midpoint_proj = midpoint_gdf.to_crs(src.crs).geometry.values[0]
-                else:
-                    midpoint_proj = midpoint
-
-                # Sample raster at midpoint
-                r, c = rowcol(src.transform, midpoint_proj.x, midpoint_proj.y)
-
-                # Check bounds and read value
-                if 0 <= r < src.height and 0 <= c < src.width:
-                    order_value = src.read(1, window=((r, r+1), (c, c+1)))[0, 0]
-                    # Handle nodata
-                    if src.nodata is not None and order_value == src.nodata:
-                        order_value = 1
-                else:
-                    order_value = 1
-
-                orders.append(int(order_value))
+            # Midpoint of every stream segment in one call
+            midpoints = shapely.line_interpolate_point(
+                np.asarray(streams_gdf.geometry.values), 0.5, normalized=True
+            )
+            xs, ys = shapely.get_x(midpoints), shapely.get_y(midpoints)
+
+            # Transform to raster CRS if needed, as arrays
+            if streams_gdf.crs != src.crs:
+                transformer = Transformer.from_crs(streams_gdf.crs, src.crs.to_wkt(), always_xy=True)
+                xs, ys = transformer.transform(xs, ys)
+
+            # Segments whose midpoint falls outside the raster (or on nodata)
+            # default to order 1
+            orders = np.ones(len(streams_gdf), dtype=int)
+            rows, cols = rowcol(src.transform, xs, ys)
+            rows, cols = np.asarray(rows), np.asarray(cols)
+            inside = np.flatnonzero((rows >= 0) & (rows < src.height) & (cols >= 0) & (cols < src.width))
+            sample_xs, sample_ys = np.asarray(xy(src.transform, rows[inside], cols[inside])).reshape(2, -1)
+            values = np.fromiter(
+                (v[0] for v in src.sample(zip(sample_xs, sample_ys), indexes=1)),
+                dtype=np.float64,
+                count=len(inside)
+            )
+            valid = np.isfinite(values)
+            if src.nodata is not None:
+                valid &= values != src.nodata
+            orders[inside[valid]] = values[valid].astype(int)
 
         streams_gdf['order'] = orders
 
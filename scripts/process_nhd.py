@@ -11,8 +11,15 @@ Usage:
 import click
 from pathlib import Path
 import geopandas as gpd
+import pyogrio
 from shapely.geometry import box, LineString, MultiLineString
 
+try:
+    import pyarrow  # noqa: F401  (enables pyogrio's Arrow write path)
+    USE_ARROW = True
+except ImportError:
+    USE_ARROW = False
+
 
 @click.command()
 @click.option(
@@ -206,19 +213,27 @@ def main(input, output, bounds):
         click.echo("Warning: No natural streams after filtering; all streams will be treated as connectors.")
         natural_streams = streams_final.copy()
 
-    # Explode geometries for merged layer
-    streams_merged = streams_final.copy()
-    streams_merged = streams_merged.explode(index_parts=False).reset_index(drop=True)
+    # Explode geometries for merged layer. NHD flowlines are almost always
+    # single-part already, in which case explode would only copy every row
+    if (streams_final.geom_type == 'LineString').all():
+        streams_merged = streams_final.reset_index(drop=True)
+        part_lengths = streams_proj.geometry.length.to_numpy()
+    else:
+        streams_merged = streams_final.explode(index_parts=False).reset_index(drop=True)
+        # Exploding the projected copy from above yields the same parts in
+        # the same order, so no second reprojection is needed
+        part_lengths = streams_proj.geometry.explode(index_parts=False).length.to_numpy()
     # Recompute lengths after explode for accuracy
-    streams_merged_proj = streams_merged.to_crs("EPSG:6933")
-    streams_merged['length_m'] = streams_merged_proj.geometry.length
+    streams_merged['length_m'] = part_lengths
     streams_merged['length_km'] = streams_merged['length_m'] / 1000
     streams_merged = streams_merged.to_crs("EPSG:4326")
 
     # Save to GeoPackage
     click.echo(f"\nSaving to {output_path}...")
-    natural_streams.to_file(output_path, driver='GPKG', layer='streams')
-    streams_merged.to_file(output_path, driver='GPKG', layer='streams_merged')
+    # The GeoPackage is rebuilt from source on failure, so skip SQLite fsyncs
+    pyogrio.set_gdal_config_options({'OGR_SQLITE_SYNCHRONOUS': 'OFF'})
+    for layer_gdf, layer in [(natural_streams, 'streams'), (streams_merged, 'streams_merged')]:
+        layer_gdf.to_file(output_path, driver='GPKG', layer=layer, engine='pyogrio', use_arrow=USE_ARROW)
 
     # Print summary statistics
     click.echo("\n" + "="*60)
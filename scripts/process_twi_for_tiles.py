@@ -12,6 +12,7 @@ Usage:
 """
 
 import subprocess
+import sys
 from pathlib import Path
 import numpy as np
 import warnings
@@ -24,6 +25,13 @@ except ImportError:
     print("pip install rasterio numpy")
     exit(1)
 
+# Add path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+from lib.raster_stats import (
+    TWI_HIST_MIN, TWI_HIST_MAX, TWI_HIST_BIN,
+    new_histogram, update_histogram, histogram_percentiles
+)
+
 
 def normalize_twi(
     input_path: Path,
@@ -34,6 +42,9 @@ def normalize_twi(
     """
     Normalize TWI to 0-255 range using percentiles.
 
+    The percentiles come from a streaming histogram built in a first pass over
+    the raster blocks; a second pass writes the normalized blocks.
+
     Args:
         input_path: Path to raw TWI raster
         output_path: Path to normalized 8-bit output
@@ -42,42 +53,48 @@ def normalize_twi(
     """
     print(f"Reading TWI from {input_path}...")
     with rasterio.open(input_path) as src:
-        twi = src.read(1).astype(np.float64)
         profile = src.profile.copy()
         nodata = src.nodata
-
-    # Mask valid data
-    if nodata is not None:
-        valid_mask = (twi != nodata) & np.isfinite(twi)
-    else:
-        valid_mask = np.isfinite(twi)
-
-    twi_valid = twi[valid_mask]
-
-    # Compute percentiles
-    vmin, vmax = np.percentile(twi_valid, [p_low, p_high])
-    print(f"TWI range: [{vmin:.3f}, {vmax:.3f}] (P{p_low}-P{p_high})")
-
-    # Normalize to 0-255
-    twi_norm = np.zeros_like(twi, dtype=np.uint8)
-
-    # Clip and scale
-    twi_clipped = np.clip(twi, vmin, vmax)
-    twi_scaled = ((twi_clipped - vmin) / (vmax - vmin) * 255)
-
-    # Only set valid pixels
-    twi_norm[valid_mask] = twi_scaled[valid_mask].astype(np.uint8)
-
-    # Save normalized raster
-    print(f"Saving normalized TWI to {output_path}...")
-    profile.update({
-        'dtype': 'uint8',
-        'nodata': 0,
-        'compress': 'lzw'
-    })
-
-    with rasterio.open(output_path, 'w', **profile) as dst:
-        dst.write(twi_norm, 1)
+        # compute_twi.py writes scaled int16; older float rasters have scale 1
+        scale = src.scales[0]
+
+        def read_block(window):
+            twi = src.read(1, window=window, out_dtype='float32')
+            if nodata is not None:
+                valid_mask = (twi != nodata) & np.isfinite(twi)
+            else:
+                valid_mask = np.isfinite(twi)
+            if scale != 1.0:
+                twi *= scale
+            return twi, valid_mask
+
+        # Compute percentiles
+        hist = new_histogram(TWI_HIST_MIN, TWI_HIST_MAX, TWI_HIST_BIN)
+        for _, window in src.block_windows(1):
+            twi, valid_mask = read_block(window)
+            update_histogram(hist, twi[valid_mask], TWI_HIST_MIN, TWI_HIST_BIN)
+
+        vmin, vmax = histogram_percentiles(hist, [p_low, p_high], TWI_HIST_MIN, TWI_HIST_BIN)
+        print(f"TWI range: [{vmin:.3f}, {vmax:.3f}] (P{p_low}-P{p_high})")
+
+        # Save normalized raster
+        print(f"Saving normalized TWI to {output_path}...")
+        profile.update({
+            'dtype': 'uint8',
+            'nodata': 0,
+            'compress': 'lzw'
+        })
+
+        with rasterio.open(output_path, 'w', **profile) as dst:
+            for _, window in src.block_windows(1):
+                twi, valid_mask = read_block(window)
+
+                # Clip and scale to 0-255, only setting valid pixels
+                twi_norm = np.zeros(twi.shape, dtype=np.uint8)
+                twi_scaled = (np.clip(twi, vmin, vmax) - vmin) / (vmax - vmin) * 255
+                twi_norm[valid_mask] = twi_scaled[valid_mask].astype(np.uint8)
+
+                dst.write(twi_norm, 1, window=window)
 
     print(f"Normalization complete!")
     return output_path